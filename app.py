@@ -1,10 +1,15 @@
 import streamlit as st
-import pandas as pd
-import datetime
-import altair as alt
-import numpy_financial as npf
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
+from planner import charts
+from planner.cache import ForecastCache, scenario_key
+from planner.engine import Expense, summarize
+from planner.graph import ForecastGraph
+from planner.ledger import project_monthly
+from planner.loans import MAX_MONTHS, expense_schedule
+from planner.montecarlo import simulate
+from planner.scenario import RETIREMENT_AGE_RANGE, scenario_inputs
+from planner.solver import earliest_retirement_age, max_drawdown_rate, min_monthly_contribution
+from planner.timing import StageTimer
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Future Wealth Planner", page_icon="💰", layout="wide")
@@ -12,16 +17,39 @@ st.set_page_config(page_title="Future Wealth Planner", page_icon="💰", layout=
 # --- INITIALIZE SESSION STATE ---
 if 'report_ready' not in st.session_state: st.session_state.report_ready = False
 if 'expenses' not in st.session_state: st.session_state.expenses = []
+if 'forecast_graph' not in st.session_state: st.session_state.forecast_graph = ForecastGraph()
 
 # --- FUNCTIONS ---
 def run_calculation(): st.session_state.report_ready = True
 def add_expense(): st.session_state.expenses.append({'id': len(st.session_state.expenses) + 1, 'name': 'New Expense', 'type': 'Amortized Loan', 'balance': 250000, 'rate': 5.0, 'payment': 1500, 'start_age': 35, 'end_age': 65})
 def remove_expense(expense_id): st.session_state.expenses = [e for e in st.session_state.expenses if e['id'] != expense_id]
+def age_input(label, lo, hi, value, key):
+    # Whole years, or months once "Monthly Time Step" is on; read from session state, as that checkbox is drawn later.
+    if st.session_state.get('monthly', False): return st.number_input(label, float(lo), float(hi), float(value), 1 / 12, format="%.2f", key=key)
+    lo = int(np.ceil(lo)); return int(st.number_input(label, lo, int(hi), min(max(int(value), lo), int(hi)), 1, key=key))
+
+@st.cache_resource
+def get_forecast_cache(): return ForecastCache(maxsize=256)
+
+def build_report(assumptions, accounts, incomes, expenses, lite_charts=False, monthly=False, timer=None):
+    timer = timer or StageTimer()
+    if monthly:
+        with timer.stage('monthly ledger'): ledger = project_monthly(assumptions, accounts, incomes, expenses)
+        with timer.stage('annual rollup'): forecast = ledger.forecast()
+    else: forecast = st.session_state.forecast_graph.update(assumptions, accounts, incomes, expenses, timer=timer)
+    return {'forecast': forecast, **charts.report_figures(forecast, lite=lite_charts, timer=timer)}
+
+def build_monte_carlo(assumptions, accounts, incomes, expenses, n_paths, return_sd, inflation_sd):
+    mc = simulate(assumptions, accounts, incomes, expenses, n_paths=n_paths, return_sd=return_sd, inflation_sd=inflation_sd)
+    return {'mc': mc, 'fan_fig': charts.fan_figure(mc), 'depletion_chart': charts.depletion_chart(mc)}
 
 # --- HEADER & SIDEBAR ---
 st.title("Future Wealth Planner 💰"); st.write("A comprehensive tool to forecast your financial future."); st.markdown("---")
 with st.sidebar:
-    st.header("Global Assumptions"); current_age = st.number_input("Your Current Age", 18, 100, 30, 1); retirement_age = st.number_input("Target Retirement Age", 40, 100, 65, 1); forecast_length = st.number_input("Forecast Length (Years)", 5, 60, 40, 1); investment_return = st.slider("Assumed Annual Investment Return (%)", 0.0, 15.0, 7.0, 0.1); inflation_rate = st.slider("Assumed Annual Inflation Rate (%)", 0.0, 5.0, 2.5, 0.1); st.markdown("---"); st.button("Calculate Financial Future", on_click=run_calculation, use_container_width=True, type="primary")
+    st.header("Global Assumptions"); current_age = st.number_input("Your Current Age", 18, 100, 30, 1); retirement_age = age_input("Target Retirement Age", *RETIREMENT_AGE_RANGE, 65, key="retirement_age"); forecast_length = st.number_input("Forecast Length (Years)", 5, 60, 40, 1); investment_return = st.slider("Assumed Annual Investment Return (%)", 0.0, 15.0, 7.0, 0.1); inflation_rate = st.slider("Assumed Annual Inflation Rate (%)", 0.0, 5.0, 2.5, 0.1)
+    with st.expander("Monte Carlo Simulation"): mc_enabled = st.checkbox("Run Monte Carlo Simulation", False, key="mc_enabled"); mc_paths = st.select_slider("Simulated Paths", [10_000, 25_000, 50_000, 100_000], 10_000, key="mc_paths"); return_sd = st.slider("Annual Return Volatility (%)", 0.0, 30.0, 12.0, 0.5, key="mc_return_sd"); inflation_sd = st.slider("Annual Inflation Volatility (%)", 0.0, 5.0, 1.0, 0.1, key="mc_inflation_sd")
+    with st.expander("Display Options"): monthly = st.checkbox("Monthly Time Step", False, key="monthly", help="Projects month by month: contributions, growth and drawdowns compound monthly and loans are paid off in the exact month. Ages can then be entered in months. Results are summed to years for display."); lite_charts = st.checkbox("Lightweight Charts", False, key="lite_charts", help=f"Faster rendering for large plans: charts combine all but the {charts.LITE_MAX_SERIES - 1} largest series of each kind into 'Other'."); show_timings = st.checkbox("Show Performance Timings", False, key="show_timings", help="Adds a panel to the report with the milliseconds spent in each stage of this rerun.")
+    st.markdown("---"); st.button("Calculate Financial Future", on_click=run_calculation, use_container_width=True, type="primary")
 
 # --- TABS ---
 tab_income, tab_assets, tab_expenses, tab_events, tab_report = st.tabs(["💰 Income", "📈 Assets & Investments", "💸 Expenses", "🏡 Life Events", "📊 Forecast & Report"])
@@ -34,18 +62,18 @@ with tab_income:
     with c2: st.subheader("Secondary Job"); inc_job2 = st.checkbox("Include in Forecast", True, key="inc_job2"); job2_name = st.text_input("Source Name", "Side Hustle", key="job2_name"); job2_income = st.number_input("Current Annual Salary ($)", 0, None, 15000, 1000, key="job2_income"); job2_growth = st.slider("Annual Salary Growth Rate (%)", 0.0, 10.0, 2.0, 0.1, key="job2_growth")
     with st.expander("Add Future Income (Pensions, Social Security, etc.)"):
         c3, c4, c5 = st.columns(3)
-        with c3: st.subheader("Social Security"); inc_ss = st.checkbox("Include in Forecast", True, key="inc_ss"); ss_name = st.text_input("Source Name", "Social Security", key="ss_name", disabled=True); ss_start_age = st.number_input("Start Age", 62, 70, 67, key="ss_start"); ss_annual_amount = st.number_input("Estimated Annual Amount ($)", 0, None, 24000, 100, key="ss_amount")
-        with c4: st.subheader("Pension 1"); inc_pension1 = st.checkbox("Include in Forecast", True, key="inc_p1"); pension1_name = st.text_input("Source Name", "Military Pension", key="pension1_name"); pension1_start_age = st.number_input("Start Age", 40, 80, 55, key="p1_start"); pension1_annual_amount = st.number_input("Annual Amount ($)", 0, None, 30000, 100, key="p1_amount")
-        with c5: st.subheader("Pension 2"); inc_pension2 = st.checkbox("Include in Forecast", False, key="inc_p2"); pension2_name = st.text_input("Source Name", "Corporate Pension", key="pension2_name"); pension2_start_age = st.number_input("Start Age", 40, 80, 65, key="p2_start"); pension2_annual_amount = st.number_input("Annual Amount ($)", 0, None, 12000, 100, key="p2_amount")
+        with c3: st.subheader("Social Security"); inc_ss = st.checkbox("Include in Forecast", True, key="inc_ss"); ss_name = st.text_input("Source Name", "Social Security", key="ss_name", disabled=True); ss_start_age = age_input("Start Age", 62, 70, 67, key="ss_start"); ss_annual_amount = st.number_input("Estimated Annual Amount ($)", 0, None, 24000, 100, key="ss_amount")
+        with c4: st.subheader("Pension 1"); inc_pension1 = st.checkbox("Include in Forecast", True, key="inc_p1"); pension1_name = st.text_input("Source Name", "Military Pension", key="pension1_name"); pension1_start_age = age_input("Start Age", 40, 80, 55, key="p1_start"); pension1_annual_amount = st.number_input("Annual Amount ($)", 0, None, 30000, 100, key="p1_amount")
+        with c5: st.subheader("Pension 2"); inc_pension2 = st.checkbox("Include in Forecast", False, key="inc_p2"); pension2_name = st.text_input("Source Name", "Corporate Pension", key="pension2_name"); pension2_start_age = age_input("Start Age", 40, 80, 65, key="p2_start"); pension2_annual_amount = st.number_input("Annual Amount ($)", 0, None, 12000, 100, key="p2_amount")
 
 with tab_assets:
     # ... Assets tab code is unchanged ...
     st.header("Assets & Investments"); st.write("Detail your financial accounts.")
     c1, c2, c3 = st.columns(3)
-    with c1: st.subheader("Pre-Tax Retirement"); inc_pretax = st.checkbox("Include in Forecast", True, key="inc_pretax"); pretax_name = st.text_input("Account Name", "401(k)/Traditional IRA", key="pretax_name"); pretax_balance = st.number_input("Current Balance ($)", 0, None, 50000, 1000, key="pretax_bal"); pretax_contrib = st.number_input("Monthly Contribution ($)", 0, None, 500, 100, key="pretax_con"); pretax_wd_start = st.number_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="pretax_wd_start"); pretax_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 4.0, 0.1, key="pretax_wd")
-    with c2: st.subheader("Roth Retirement"); inc_roth = st.checkbox("Include in Forecast", True, key="inc_roth"); roth_name = st.text_input("Account Name", "Roth IRA/401(k)", key="roth_name"); roth_balance = st.number_input("Current Balance ($)", 0, None, 25000, 1000, key="roth_bal"); roth_contrib = st.number_input("Monthly Contribution ($)", 0, None, 300, 100, key="roth_con"); roth_wd_start = st.number_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="roth_wd_start"); roth_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 4.0, 0.1, key="roth_wd")
-    with c3: st.subheader("Taxable Brokerage"); inc_brokerage = st.checkbox("Include in Forecast", True, key="inc_brokerage"); brokerage_name = st.text_input("Account Name", "Taxable Brokerage", key="brokerage_name"); brokerage_balance = st.number_input("Current Balance ($)", 0, None, 10000, 1000, key="brokerage_bal"); brokerage_contrib = st.number_input("Monthly Contribution ($)", 0, None, 200, 100, key="brokerage_con"); brokerage_wd_start = st.number_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="brokerage_wd_start"); brokerage_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 2.0, 0.1, key="brokerage_wd")
-    with st.expander("Required Minimum Distributions (RMDs)"): st.info("For Pre-Tax accounts, drawdowns will be forced to begin at this age if they haven't started already."); rmd_start_age = st.number_input("RMD Start Age", 70, 80, 75, key="rmd_age")
+    with c1: st.subheader("Pre-Tax Retirement"); inc_pretax = st.checkbox("Include in Forecast", True, key="inc_pretax"); pretax_name = st.text_input("Account Name", "401(k)/Traditional IRA", key="pretax_name"); pretax_balance = st.number_input("Current Balance ($)", 0, None, 50000, 1000, key="pretax_bal"); pretax_contrib = st.number_input("Monthly Contribution ($)", 0, None, 500, 100, key="pretax_con"); pretax_wd_start = age_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="pretax_wd_start"); pretax_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 4.0, 0.1, key="pretax_wd")
+    with c2: st.subheader("Roth Retirement"); inc_roth = st.checkbox("Include in Forecast", True, key="inc_roth"); roth_name = st.text_input("Account Name", "Roth IRA/401(k)", key="roth_name"); roth_balance = st.number_input("Current Balance ($)", 0, None, 25000, 1000, key="roth_bal"); roth_contrib = st.number_input("Monthly Contribution ($)", 0, None, 300, 100, key="roth_con"); roth_wd_start = age_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="roth_wd_start"); roth_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 4.0, 0.1, key="roth_wd")
+    with c3: st.subheader("Taxable Brokerage"); inc_brokerage = st.checkbox("Include in Forecast", True, key="inc_brokerage"); brokerage_name = st.text_input("Account Name", "Taxable Brokerage", key="brokerage_name"); brokerage_balance = st.number_input("Current Balance ($)", 0, None, 10000, 1000, key="brokerage_bal"); brokerage_contrib = st.number_input("Monthly Contribution ($)", 0, None, 200, 100, key="brokerage_con"); brokerage_wd_start = age_input("Drawdown Start Age", retirement_age, 100, retirement_age, key="brokerage_wd_start"); brokerage_wd_rate = st.slider("Retirement Drawdown (%/yr)", 0.0, 10.0, 2.0, 0.1, key="brokerage_wd")
+    with st.expander("Required Minimum Distributions (RMDs)"): st.info("For Pre-Tax accounts, drawdowns will be forced to begin at this age if they haven't started already."); rmd_start_age = age_input("RMD Start Age", 70, 80, 75, key="rmd_age")
     with st.expander("Add Physical & Other Assets"): st.caption("These assets will be used in future 'Net Worth' calculations."); c4, c5, c6 = st.columns(3);
     with c4: st.number_input("Jewelry Value ($)", 0, None, 5000);
     with c5: st.number_input("Precious Metals Value ($)", 0, None, 10000);
@@ -62,17 +90,24 @@ with tab_expenses:
         with c2:
             label = "Total Cost ($)" if expense['type'] == 'One-Time Cost' else "Loan Balance ($)" if expense['type'] == 'Amortized Loan' else "Monthly Cost ($)"
             expense['balance'] = st.number_input(label, 0, None, expense['balance'], key=f"exp_bal_{i}")
-            expense['start_age'] = st.number_input("Start Age", 18, 100, expense['start_age'], key=f"exp_start_age_{i}")
+            expense['start_age'] = age_input("Start Age", 18, 100, expense['start_age'], key=f"exp_start_age_{i}")
         with c3:
             if expense['type'] == 'Amortized Loan':
                 expense['rate'] = st.slider("Interest Rate (%)", 0.0, 25.0, expense['rate'], 0.1, key=f"exp_rate_{i}")
                 expense['payment'] = st.number_input("Monthly Payment ($)", 0, None, expense['payment'], key=f"exp_payment_{i}")
+                expense['extra_payment'] = st.number_input("Extra Monthly Payment ($)", 0, None, expense.get('extra_payment', 0), key=f"exp_extra_{i}")
+                if st.checkbox("Rate Reset", bool(expense.get('rate_resets')), key=f"exp_reset_{i}"):
+                    reset_age, reset_rate = (expense.get('rate_resets') or [(expense['start_age'] + 5, expense['rate'])])[0]
+                    expense['rate_resets'] = [(age_input("Reset Age", expense['start_age'], 120, max(reset_age, expense['start_age']), key=f"exp_reset_age_{i}"), st.slider("New Interest Rate (%)", 0.0, 25.0, float(reset_rate), 0.1, key=f"exp_reset_rate_{i}"))]
+                else: expense['rate_resets'] = []
             elif expense['type'] == 'Constant':
-                expense['end_age'] = st.number_input("End Age", expense['start_age'], 120, expense['end_age'], key=f"exp_end_age_{i}")
+                expense['end_age'] = age_input("End Age", expense['start_age'], 120, expense['end_age'], key=f"exp_end_age_{i}")
         with c4: st.write("##"); st.button("Remove", key=f"exp_remove_{i}", on_click=remove_expense, args=(expense['id'],))
-        if expense['type'] == 'Amortized Loan' and expense.get('payment', 0) > 0 and expense.get('rate', 0) > 0:
-            try: nper = npf.nper((expense['rate'] / 100) / 12, -expense['payment'], expense['balance']); st.metric("Estimated Years to Payoff", f"{(nper/12):.1f} years")
-            except (ValueError, OverflowError): st.warning("Cannot calculate payoff.")
+        if expense['type'] == 'Amortized Loan' and expense.get('payment', 0) > 0:
+            schedule = expense_schedule(Expense.from_dict(expense))
+            if schedule is None: st.info("This loan has no balance to repay, so it adds no payments to the forecast.")
+            elif schedule.paid_off: c1, c2 = st.columns(2); c1.metric("Estimated Years to Payoff", f"{schedule.years_to_payoff:.1f} years"); c2.metric("Total Interest", f"${schedule.total_interest:,.0f}")
+            else: st.warning(f"Cannot calculate payoff: the payment does not repay the loan within {MAX_MONTHS // 12} years, usually because it does not cover the interest. The forecast still charges the payment every year for as long as the loan runs.")
 
 with tab_events: st.header("Major Life Events"); st.info("Functionality for this tab is in development.")
 
@@ -81,90 +116,33 @@ with tab_report:
     if not st.session_state.report_ready: st.info("Click 'Calculate Financial Future' in the sidebar to generate your forecast.")
     else:
         # --- Data Prep ---
-        start_year = datetime.date.today().year; years = list(range(start_year, start_year + forecast_length + 1)); ages = list(range(current_age, current_age + forecast_length + 1))
-        df = pd.DataFrame(index=years, data={'Age': ages})
-        
-        total_contributions = 0; event_list = []
-        asset_cols, drawdown_cols = [], []
-        if inc_pretax: df[pretax_name] = 0; df.loc[start_year, pretax_name] = pretax_balance; asset_cols.append(pretax_name); df[f"{pretax_name} Drawdown"] = 0; drawdown_cols.append(f"{pretax_name} Drawdown")
-        if inc_roth: df[roth_name] = 0; df.loc[start_year, roth_name] = roth_balance; asset_cols.append(roth_name); df[f"{roth_name} Drawdown"] = 0; drawdown_cols.append(f"{roth_name} Drawdown")
-        if inc_brokerage: df[brokerage_name] = 0; df.loc[start_year, brokerage_name] = brokerage_balance; asset_cols.append(brokerage_name); df[f"{brokerage_name} Drawdown"] = 0; drawdown_cols.append(f"{brokerage_name} Drawdown")
-        for i, year in enumerate(years[1:]):
-            prev_year, age = years[i], df.loc[year, 'Age']
-            for col in asset_cols:
-                prev_balance = df.loc[prev_year, col]; growth = prev_balance * (investment_return / 100); drawdown = 0
-                if age < retirement_age:
-                    contrib_map = {'401(k)/Traditional IRA': pretax_contrib, 'Roth IRA/401(k)': roth_contrib, 'Taxable Brokerage': brokerage_contrib}; contrib = contrib_map.get(col, 0) * 12; total_contributions += contrib; df.loc[year, col] = prev_balance + growth + contrib
-                else:
-                    wd_start, wd_rate = {'401(k)/Traditional IRA': (pretax_wd_start, pretax_wd_rate), 'Roth IRA/401(k)': (roth_wd_start, roth_wd_rate), 'Taxable Brokerage': (brokerage_wd_start, brokerage_wd_rate)}.get(col)
-                    if (col == pretax_name and age >= rmd_start_age) or age >= wd_start: drawdown = (prev_balance + growth) * (wd_rate / 100); df.loc[year, f"{col} Drawdown"] = drawdown
-                    df.loc[year, col] = prev_balance + growth - drawdown
-        
-        if inc_job1 and job1_name and (retirement_age - 1) in ages: df[job1_name] = [(job1_income * (1 + job1_growth / 100)**i) if age < retirement_age else 0 for i, age in enumerate(ages)]; event_list.append({'Age': retirement_age - 1, 'Value': df.loc[df['Age']==retirement_age-1, job1_name].values[0], 'Event': f'{job1_name} Ends', 'Source': job1_name})
-        if inc_job2 and job2_name and (retirement_age - 1) in ages: df[job2_name] = [(job2_income * (1 + job2_growth / 100)**i) if age < retirement_age else 0 for i, age in enumerate(ages)]; event_list.append({'Age': retirement_age - 1, 'Value': df.loc[df['Age']==retirement_age-1, job2_name].values[0], 'Event': f'{job2_name} Ends', 'Source': job2_name})
-        if inc_ss and ss_name and ss_start_age in ages: df[ss_name] = [ss_annual_amount if age >= ss_start_age else 0 for age in ages]; event_list.append({'Age': ss_start_age, 'Value': ss_annual_amount, 'Event': f'{ss_name} Begins', 'Source': ss_name})
-        if inc_pension1 and pension1_name and pension1_start_age in ages: df[pension1_name] = [pension1_annual_amount if age >= pension1_start_age else 0 for age in ages]; event_list.append({'Age': pension1_start_age, 'Value': pension1_annual_amount, 'Event': f'{pension1_name} Begins', 'Source': pension1_name})
-        if inc_pension2 and pension2_name and pension2_start_age in ages: df[pension2_name] = [pension2_annual_amount if age >= pension2_start_age else 0 for age in ages]; event_list.append({'Age': pension2_start_age, 'Value': pension2_annual_amount, 'Event': f'{pension2_name} Begins', 'Source': pension2_name})
-        for col in drawdown_cols:
-            first_draw_year = df[df[col] > 0].first_valid_index()
-            if first_draw_year and first_draw_year in df.index: age = df.loc[first_draw_year, 'Age']; val = df.loc[first_draw_year, col]; event_list.append({'Age': age, 'Value': val, 'Event': f'{col} Begins', 'Source': col})
-        
-        expense_cols = []; df['Total Expenses'] = 0
-        for expense in st.session_state.expenses:
-            name, type, start_age, balance = expense['name'], expense['type'], expense['start_age'], expense['balance']
-            df[name] = 0; expense_cols.append(name)
-            if type == 'One-Time Cost' and start_age in ages: df.loc[df['Age'] == start_age, name] = -balance; event_list.append({'Age': start_age, 'Value': -balance, 'Event': f'{name} Occurs', 'Source': 'Total Expenses'})
-            elif type == 'Constant' and start_age in ages: end_age = expense.get('end_age', 120); df.loc[(df['Age'] >= start_age) & (df['Age'] < end_age), name] = -(balance * 12)
-            elif type == 'Amortized Loan':
-                pmt, rate = expense.get('payment', 0), expense.get('rate', 0)
-                if pmt > 0:
-                    try:
-                        monthly_rate = (rate / 100) / 12 if rate > 0 else 0; nper = npf.nper(monthly_rate, -pmt, balance) if rate > 0 else balance / pmt; payoff_age = start_age + (nper / 12)
-                        for age_ in range(start_age, int(payoff_age) + 1):
-                            if age_ in ages: df.loc[df['Age'] == age_, name] = -(pmt * 12)
-                        if start_age in ages: event_list.append({'Age': start_age, 'Value': -(pmt*12), 'Event': f'{name} Begins', 'Source': 'Total Expenses'})
-                        if int(payoff_age) in ages: event_list.append({'Age': int(payoff_age), 'Value': df.loc[df['Age'] == int(payoff_age), name].values[0], 'Event': f'{name} Paid Off', 'Source': 'Total Expenses'})
-                    except (ValueError, OverflowError): pass
-            df['Total Expenses'] += df[name]
-
-        income_cols = [c for c in [job1_name, job2_name, ss_name, pension1_name, pension2_name] + drawdown_cols if c in df.columns and df[c].sum() != 0]
-        df['Total Income'] = df[income_cols].sum(axis=1)
-        df['Net Annual Cash Flow'] = df['Total Income'] + df['Total Expenses']
-        df['hover_text'] = df[income_cols].apply(lambda row: '<br>'.join([f"<b>{col}:</b> ${val:,.0f}" for col, val in row.items() if val > 0]), axis=1)
+        scenario = {
+            'current_age': current_age, 'retirement_age': retirement_age, 'forecast_length': forecast_length, 'investment_return': investment_return, 'inflation_rate': inflation_rate,
+            'inc_job1': inc_job1, 'job1_name': job1_name, 'job1_income': job1_income, 'job1_growth': job1_growth,
+            'inc_job2': inc_job2, 'job2_name': job2_name, 'job2_income': job2_income, 'job2_growth': job2_growth,
+            'inc_ss': inc_ss, 'ss_name': ss_name, 'ss_start_age': ss_start_age, 'ss_annual_amount': ss_annual_amount,
+            'inc_pension1': inc_pension1, 'pension1_name': pension1_name, 'pension1_start_age': pension1_start_age, 'pension1_annual_amount': pension1_annual_amount,
+            'inc_pension2': inc_pension2, 'pension2_name': pension2_name, 'pension2_start_age': pension2_start_age, 'pension2_annual_amount': pension2_annual_amount,
+            'inc_pretax': inc_pretax, 'pretax_name': pretax_name, 'pretax_balance': pretax_balance, 'pretax_contrib': pretax_contrib, 'pretax_wd_start': pretax_wd_start, 'pretax_wd_rate': pretax_wd_rate,
+            'inc_roth': inc_roth, 'roth_name': roth_name, 'roth_balance': roth_balance, 'roth_contrib': roth_contrib, 'roth_wd_start': roth_wd_start, 'roth_wd_rate': roth_wd_rate,
+            'inc_brokerage': inc_brokerage, 'brokerage_name': brokerage_name, 'brokerage_balance': brokerage_balance, 'brokerage_contrib': brokerage_contrib, 'brokerage_wd_start': brokerage_wd_start, 'brokerage_wd_rate': brokerage_wd_rate,
+            'rmd_start_age': rmd_start_age, 'expenses': st.session_state.expenses,
+        }
+        assumptions, accounts, incomes, expenses = scenario_inputs(scenario)
+        timer = StageTimer(); cache = get_forecast_cache(); key = scenario_key(assumptions, accounts, incomes, expenses, {'lite_charts': lite_charts, 'monthly': monthly})
+        report = cache.get_or_compute(key, lambda: build_report(assumptions, accounts, incomes, expenses, lite_charts, monthly, timer)); forecast = report['forecast']
+        df, total_contributions = forecast.df, forecast.total_contributions
+        asset_cols, income_cols, expense_cols = forecast.asset_cols, forecast.income_cols, forecast.expense_cols
+        ages = list(df['Age'])
 
         # --- PLOTLY CASH FLOW CHART ---
         st.subheader("Interactive Cash Flow Forecast")
-        chart_cols = income_cols + ['Total Expenses', 'Net Annual Cash Flow', 'Total Income']
-        df_melted = df.reset_index().melt(id_vars=['index', 'Age', 'hover_text'], value_vars=chart_cols, var_name='Source', value_name='Value'); df_melted.rename(columns={'index':'Year'}, inplace=True)
-        fig = px.line(df_melted, x="Age", y="Value", color='Source', custom_data=['hover_text'])
-        fig.update_layout(title_text="Annual Cash Flow Over Time", xaxis_title="Your Age", yaxis_title="Annual Cash Flow", yaxis_tickformat='$,.0f', legend_title_text='Cash Flow Source')
-        
-        main_hovertemplate = "<b><u>%{fullData.name}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<extra></extra>"
-        total_income_hovertemplate = "<b><u>%{fullData.name}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<br><br><b>Income Breakdown:</b><br>%{customdata[0]}<extra></extra>"
-        fig.update_traces(hovertemplate=main_hovertemplate)
-        fig.for_each_trace(lambda trace: trace.update(hovertemplate=total_income_hovertemplate) if trace.name == "Total Income" else ())
-        
-        color_map = {trace.name: trace.line.color for trace in fig.data}
-        event_df = pd.DataFrame(event_list)
-        if not event_df.empty:
-            event_df = event_df[event_df['Age'].isin(ages) & event_df['Value'].notna()].copy()
-            event_df['Color'] = event_df['Source'].map(color_map)
-            
-            markers_fig = px.scatter(event_df, x='Age', y='Value', color='Source', color_discrete_map=color_map, custom_data=['Event'])
-            markers_fig.update_traces(
-                marker=dict(size=12, symbol='diamond', line=dict(width=2, color='DarkSlateGrey')),
-                hovertemplate="<b><u>Event: %{customdata[0]}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<extra></extra>",
-                showlegend=False
-            )
-            for trace in markers_fig.data:
-                fig.add_trace(trace)
-        st.plotly_chart(fig, use_container_width=True)
+        with timer.stage('render cash flow'): st.plotly_chart(report['cash_flow_fig'], use_container_width=True)
         
         # --- PROFESSIONAL CFP-STYLE REPORT ---
         st.markdown("---"); st.subheader("Executive Summary")
-        ret_income_avg = df[df['Age'] >= retirement_age]['Total Income'].mean()
-        pre_ret_income_avg = df[(df['Age'] >= retirement_age - 5) & (df['Age'] < retirement_age)]['Total Income'].mean()
-        replacement_ratio = (ret_income_avg / pre_ret_income_avg) * 100 if pre_ret_income_avg > 0 else 0
+        with timer.stage('summary'): summary = summarize(forecast, retirement_age, investment_return)
+        ret_income_avg, replacement_ratio = summary['avg_retirement_income'], summary['replacement_ratio']
         
         if replacement_ratio >= 85: outlook, color = "Excellent", "green"
         elif replacement_ratio >= 70: outlook, color = "Good", "#32CD32"
@@ -173,10 +151,8 @@ with tab_report:
         st.markdown(f"### <span style='color:{color};'>Your Financial Outlook is {outlook}</span>", unsafe_allow_html=True)
         
         st.markdown("---"); st.subheader("Retirement Snapshot")
-        net_worth_at_retirement = df.loc[df['Age'] == retirement_age, asset_cols].sum().sum()
-        total_growth = df[asset_cols].iloc[-1].sum() - df[asset_cols].iloc[0].sum() - total_contributions
-        depletion_years = df[(df['Age'] > retirement_age) & (df[asset_cols].sum(axis=1) <= 0)]
-        depletion_age = depletion_years['Age'].min() if not depletion_years.empty else "N/A"
+        net_worth_at_retirement, total_growth = summary['net_worth_at_retirement'], summary['total_growth']
+        depletion_age = summary['funded_depletion_age'] if summary['funded_depletion_age'] is not None else "Never"
         
         c1, c2, c3 = st.columns(3)
         c1.metric("Projected Net Worth at Retirement", f"${net_worth_at_retirement:,.0f}")
@@ -186,18 +162,54 @@ with tab_report:
         c1, c2, c3 = st.columns(3)
         c1.metric("Total Lifetime Contributions", f"${total_contributions:,.0f}")
         c2.metric("Total Investment Growth", f"${total_growth:,.0f}")
-        c3.metric("Portfolio Depletion Age", str(depletion_age))
+        c3.metric("Portfolio Depletion Age", str(depletion_age), help="First age after retirement at which your portfolio can no longer cover your cash shortfalls, the same test Monte Carlo and Goal Seek use.")
 
         ret_income_sources = df[df['Age'] >= retirement_age][income_cols].mean(); ret_income_sources = ret_income_sources[ret_income_sources > 0]
         if not ret_income_sources.empty:
             st.write("**Average Retirement Income Breakdown:**"); breakdown_df = ret_income_sources.reset_index(); breakdown_df.columns = ['Source', 'Average Annual Amount']; breakdown_df['% of Total'] = (breakdown_df['Average Annual Amount'] / breakdown_df['Average Annual Amount'].sum()) * 100
             st.dataframe(breakdown_df.style.format({'Average Annual Amount': '${:,.0f}', '% of Total': '{:.0f}%'}), use_container_width=True)
 
+        if mc_enabled:
+            st.markdown("---"); st.subheader("Monte Carlo Analysis")
+            mc_key = scenario_key(assumptions, accounts, incomes, expenses, {'n_paths': mc_paths, 'return_sd': return_sd, 'inflation_sd': inflation_sd})
+            with timer.stage('monte carlo'): mc_report = cache.get_or_compute(mc_key, lambda: build_monte_carlo(assumptions, accounts, incomes, expenses, mc_paths, return_sd, inflation_sd)); mc = mc_report['mc']
+            st.caption(f"{mc.n_paths:,} simulated market and inflation paths. Portfolio values are shown in today's dollars, after funding any retirement cash shortfalls. Each path's inflation scales your non-loan expenses; incomes and loan payments stay fixed in nominal terms.")
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Probability of Success", f"{mc.success_probability:.0%}")
+            c2.metric("Median Portfolio at Retirement", f"${mc.bands.loc[int(retirement_age), 'P50']:,.0f}" if int(retirement_age) in mc.bands.index else "N/A")
+            c3.metric("Median Depletion Age (Failed Paths)", f"{np.nanmedian(mc.depletion_ages):.0f}" if mc.success_probability < 1 else "N/A")
+            st.plotly_chart(mc_report['fan_fig'], use_container_width=True)
+            if mc_report['depletion_chart'] is not None: st.altair_chart(mc_report['depletion_chart'], use_container_width=True)
+
+        st.markdown("---"); st.subheader("Goal Seek")
+        st.write("Let the planner search for the input that meets your goal, instead of adjusting it by hand.")
+        goal = st.selectbox("Goal", ["Minimum monthly contribution to never deplete", "Earliest retirement age for a target replacement ratio", "Maximum sustainable drawdown rate"], key="goal_type")
+        c1, c2 = st.columns(2)
+        account_labels = {'pretax': pretax_name, 'roth': roth_name, 'brokerage': brokerage_name, 'all': "All Accounts"}
+        if goal.startswith("Minimum"): goal_account = c1.selectbox("Account", list(account_labels), format_func=account_labels.get, key="goal_account")
+        elif goal.startswith("Earliest"): goal_replacement = c1.slider("Target Replacement Ratio (%)", 40, 120, 70, 5, key="goal_replacement")
+        else: goal_account = c1.selectbox("Account", ['all', 'pretax', 'roth', 'brokerage'], format_func=account_labels.get, key="goal_dd_account")
+        if c2.button("Solve", key="goal_solve"):
+            try:
+                if goal.startswith("Minimum"):
+                    result = min_monthly_contribution(scenario, account=goal_account)
+                    if result is not None: st.success(f"Contribute at least **${result:,.0f}/month** to {'each of your accounts' if goal_account == 'all' else account_labels[goal_account]} and your portfolio never depletes.")
+                    else: st.warning("No contribution up to $50,000/month prevents depletion.")
+                elif goal.startswith("Earliest"):
+                    result = earliest_retirement_age(scenario, min_replacement=goal_replacement)
+                    if result is not None: st.success(f"The earliest retirement age with at least a {goal_replacement}% replacement ratio is **{result}**.")
+                    else: st.warning(f"No retirement age in the forecast between {RETIREMENT_AGE_RANGE[0]} and {RETIREMENT_AGE_RANGE[1]} reaches a {goal_replacement}% replacement ratio.")
+                else:
+                    result = max_drawdown_rate(scenario, account=goal_account)
+                    if result is not None: st.success(f"Drawing down up to **{result:.2f}%/yr** from {account_labels[goal_account]} keeps your portfolio at or above its value at retirement.")
+                    else: st.warning("Even a 0% drawdown does not preserve your portfolio's value at retirement.")
+            except ValueError as e: st.warning(str(e))
+
         st.markdown("---"); st.subheader("Asset & Expense Analysis")
         c1, c2 = st.columns(2)
         with c1:
             st.write("**Asset Summary**")
-            million_years = df[df[asset_cols].sum(axis=1) >= 1_000_000]; million_age = million_years['Age'].min() if not million_years.empty else None
+            million_age = summary['million_age']
             st.markdown(f"Your portfolio is projected to grow from **${df[asset_cols].iloc[0].sum():,.0f}** today to **${df[asset_cols].iloc[-1].sum():,.0f}** by the end of the forecast period.")
             if million_age: st.markdown(f"You are on track to cross the **$1,000,000** portfolio milestone at age **{million_age}**.")
         with c2:
@@ -205,13 +217,9 @@ with tab_report:
             loan_expenses = [e['name'] for e in st.session_state.expenses if e['type'] == 'Amortized Loan']; last_loan_payoff = 0
             if loan_expenses:
                 payoff_ages = []
-                for expense in st.session_state.expenses:
-                    if expense['type'] == 'Amortized Loan' and expense.get('payment', 0) > 0:
-                        try:
-                            monthly_rate = (expense.get('rate', 0) / 100) / 12 if expense.get('rate', 0) > 0 else 0
-                            nper = npf.nper(monthly_rate, -expense['payment'], expense['balance']) if rate > 0 else expense['balance'] / expense['payment']
-                            payoff_ages.append(expense['start_age'] + (nper / 12))
-                        except (ValueError, OverflowError): pass
+                for expense in expenses:
+                    schedule = expense_schedule(expense) if expense.type == 'Amortized Loan' else None
+                    if schedule is not None and schedule.paid_off: payoff_ages.append(schedule.payoff_age)
                 if payoff_ages: last_loan_payoff = int(max(payoff_ages))
             
             st.markdown(f"You are projected to pay a total of **${-df[expense_cols].sum().sum():,.0f}** towards your major expenses.")
@@ -221,18 +229,16 @@ with tab_report:
         st.markdown("---")
         st.subheader("Financial Composition Over Time")
         st.write("These charts show how the composition of your income, expenses, and assets changes throughout the forecast period.")
-        st.altair_chart(alt.Chart(df.reset_index().melt(id_vars=['Age'], value_vars=income_cols, var_name='Source', value_name='Value')[lambda x: x.Value > 0]).mark_area(opacity=0.8).encode(x=alt.X('Age:O', title=""), y=alt.Y('Value:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Source:N').properties(title="Income Composition"), use_container_width=True)
-        
-        c1, c2 = st.columns(2)
-        with c1:
-             expense_melted = df.reset_index().melt(id_vars=['Age'], value_vars=expense_cols, var_name='Expense', value_name='Cost'); expense_melted['Cost'] = -expense_melted['Cost']; 
-             st.altair_chart(alt.Chart(expense_melted[expense_melted['Cost'] > 0]).mark_area(opacity=0.8).encode(x=alt.X('Age:O'), y=alt.Y('Cost:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Expense:N').properties(title="Expense Composition"), use_container_width=True)
-        with c2:
-            assets_melted = df.reset_index().melt(id_vars=['Age'], value_vars=asset_cols, var_name='Account', value_name='Balance'); 
-            st.altair_chart(alt.Chart(assets_melted).mark_area(opacity=0.8).encode(x=alt.X('Age:O'), y=alt.Y('Balance:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Account:N').properties(title="Asset Composition"), use_container_width=True)
+        with timer.stage('render composition'):
+            st.altair_chart(report['income_chart'], use_container_width=True)
+            c1, c2 = st.columns(2)
+            with c1: st.altair_chart(report['expense_chart'], use_container_width=True)
+            with c2: st.altair_chart(report['asset_chart'], use_container_width=True)
 
         with st.expander("View Detailed Forecast Data Table"):
-            display_df = df.copy().set_index('Age');
-            for col in display_df.columns:
-                if col not in ['Age', 'cash_flow_change', 'hover_text']: display_df[col] = display_df[col].apply(lambda x: f"${x:,.0f}")
-            st.dataframe(display_df.drop(columns=['hover_text']), use_container_width=True)
+            with timer.stage('render table'): st.dataframe(df.set_index('Age').round(), column_config={col: st.column_config.NumberColumn(format="$%,d") for col in df.columns if col != 'Age'}, use_container_width=True)
+        cache_stats = cache.stats(); st.caption(f"Forecast cache: {cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, {cache_stats['size']}/{cache_stats['maxsize']} scenarios stored.")
+        if show_timings:
+            with st.expander("Performance Timings (this rerun)", expanded=True):
+                timings = timer.frame(); st.caption(f"{timer.total_ms():,.1f} ms across {len(timings)} timed stages." + ("" if 'chart data' in timer.ms else " The forecast and its charts were served from the cache."))
+                st.dataframe(timings, column_config={'ms': st.column_config.NumberColumn(format="%.1f")}, hide_index=True, use_container_width=True)
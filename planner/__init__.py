@@ -0,0 +1,2 @@
+from planner.engine import Account, Assumptions, Expense, Forecast, Income, project
+from planner.graph import ForecastGraph
@@ -0,0 +1,156 @@
+"""Headless batch runner: project many saved scenarios and stream the results to Parquet.
+
+    python -m planner.batch scenarios.parquet -o results/ --workers 8
+
+Scenarios use the same fields as the app's widgets (see planner.scenario). Results are
+written as numbered part files under <output>/years and <output>/summary; re-running the
+same command after an interruption skips every scenario that already has a summary row.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from planner.engine import project_totals, summarize_totals
+from planner.scenario import scenario_inputs
+
+YEAR_COLUMNS = ['Total Assets', 'Total Drawdowns', 'Total Income', 'Total Expenses', 'Net Annual Cash Flow']
+SUMMARY_COLUMNS = ['net_worth_at_retirement', 'avg_retirement_income', 'replacement_ratio', 'total_contributions', 'total_growth', 'starting_assets', 'ending_assets', 'depletion_age', 'million_age', 'funded_depletion_age', 'funded_ending_assets']
+
+
+# --- INPUT ---
+def iter_scenarios(path, batch_size=1000):
+    # Yields scenario dicts without holding more than one batch of a CSV or Parquet file in memory.
+    path = Path(path); suffix = path.suffix.lower()
+    if suffix == '.parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size): yield from batch.to_pylist()
+    elif suffix == '.csv':
+        # IDs are read as raw text, so '007' keeps its zeros and a blank ID cannot turn the column into floats.
+        for chunk in pd.read_csv(path, chunksize=batch_size, converters={'scenario_id': str}): yield from chunk.to_dict('records')
+    elif suffix in ('.jsonl', '.ndjson'):
+        with open(path) as f: yield from (json.loads(line) for line in f if line.strip())
+    elif suffix == '.json':
+        with open(path) as f: data = json.load(f)
+        yield from (data if isinstance(data, list) else data.get('scenarios', [data]))
+    else:
+        raise ValueError(f"Unsupported scenario file type: {path.suffix}")
+
+
+def count_scenarios(path):
+    path = Path(path); suffix = path.suffix.lower()
+    if suffix == '.parquet': return pq.ParquetFile(path).metadata.num_rows
+    if suffix in ('.csv', '.jsonl', '.ndjson'):
+        with open(path) as f: return sum(1 for line in f if line.strip()) - (suffix == '.csv')
+    return sum(1 for _ in iter_scenarios(path))
+
+
+# --- WORKER ---
+def run_scenario(scenario_id, scenario):
+    assumptions, accounts, incomes, expenses = scenario_inputs(scenario)
+    totals, total_contributions = project_totals(assumptions, accounts, incomes, expenses)
+    return totals, summarize_totals(totals, assumptions.retirement_age, total_contributions, assumptions.investment_return)
+
+
+def run_chunk(chunk):
+    # Returns (per-year frame, summary frame) for a list of (scenario_id, scenario) pairs.
+    years, rows = [], []
+    for scenario_id, scenario in chunk:
+        try:
+            totals, summary = run_scenario(scenario_id, scenario)
+            years.append((scenario_id, totals)); rows.append({'scenario_id': scenario_id, **summary, 'error': ''})
+        except Exception as e:
+            rows.append({'scenario_id': scenario_id, 'error': f"{type(e).__name__}: {e}"})
+    # Concatenate column-wise with NumPy rather than building one small frame per scenario.
+    years_df = pd.DataFrame({'scenario_id': np.repeat([sid for sid, _ in years], [len(t['Age']) for _, t in years]).astype(str) if years else np.array([], dtype=str)})
+    for c in ['Year', 'Age'] + YEAR_COLUMNS: years_df[c] = np.concatenate([t[c] for _, t in years]) if years else np.array([])
+    summary_df = pd.DataFrame(rows, columns=['scenario_id'] + SUMMARY_COLUMNS + ['error'])
+    # Fix the dtypes so every part file shares one schema, whatever its values.
+    years_df = years_df.astype({'scenario_id': str, 'Year': 'int64', 'Age': 'int64', **{c: 'float64' for c in YEAR_COLUMNS}})
+    summary_df = summary_df.astype({'scenario_id': str, 'error': str, **{c: 'float64' for c in SUMMARY_COLUMNS}})
+    return years_df, summary_df
+
+
+# --- OUTPUT ---
+def _write_part(df, directory, part):
+    # Write-then-rename, so a part file is either complete or absent.
+    tmp = directory / f".part-{part:06d}.parquet.tmp"
+    df.to_parquet(tmp, index=False); os.replace(tmp, directory / f"part-{part:06d}.parquet")
+
+
+def _completed(output):
+    # The summary part is written last, so it marks its chunk complete; orphaned year parts are dropped.
+    years_dir, summary_dir = output / 'years', output / 'summary'
+    summary_parts = {p.name for p in summary_dir.glob('part-*.parquet')}
+    for p in list(years_dir.glob('part-*.parquet')) + list(years_dir.glob('.part-*.tmp')) + list(summary_dir.glob('.part-*.tmp')):
+        if p.name not in summary_parts: p.unlink()
+    done = set()
+    for name in summary_parts: done.update(pq.read_table(summary_dir / name, columns=['scenario_id']).column('scenario_id').to_pylist())
+    next_part = max((int(name[5:11]) for name in summary_parts), default=-1) + 1
+    return done, next_part
+
+
+def _progress(done, total, started, stream=sys.stderr):
+    elapsed = time.perf_counter() - started; rate = done / elapsed if elapsed > 0 else 0
+    eta = f"{(total - done) / rate:,.0f}s" if rate > 0 and total else "?"
+    print(f"[batch] {done:,}/{total:,} scenarios ({done / max(total, 1):.1%}) | {rate:,.0f}/s | ETA {eta}", file=stream, flush=True)
+
+
+# --- RUNNER ---
+def run(input_path, output, workers=None, chunk_size=500, restart=False, progress=True):
+    output = Path(output); workers = workers or os.cpu_count() or 1
+    for sub in ('years', 'summary'):
+        (output / sub).mkdir(parents=True, exist_ok=True)
+        if restart:
+            for p in (output / sub).glob('part-*.parquet'): p.unlink()
+    done_ids, part = _completed(output)
+    total = count_scenarios(input_path); done, started = len(done_ids), time.perf_counter()
+
+    # A scenario without an ID (missing, null or blank) is identified by its row number.
+    todo = ((str(i) if s.get('scenario_id') in (None, '') else str(s['scenario_id']), s) for i, s in enumerate(iter_scenarios(input_path)))
+    todo = ((sid, s) for sid, s in todo if sid not in done_ids)
+    chunks = iter(lambda: list(islice(todo, chunk_size)), [])
+
+    def collect(result):
+        nonlocal part, done
+        years_df, summary_df = result
+        _write_part(years_df, output / 'years', part); _write_part(summary_df, output / 'summary', part)
+        part += 1; done += len(summary_df)
+        if progress: _progress(done, total, started)
+
+    if workers == 1:
+        for chunk in chunks: collect(run_chunk(chunk))
+    else:
+        # At most two chunks per worker are in flight, which bounds memory for any input size.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(run_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in finished: collect(f.result())
+            for f in pending: collect(f.result())
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m planner.batch", description="Run saved financial plans offline and write the forecasts to Parquet.")
+    parser.add_argument('input', help="Scenario file (.json, .jsonl, .csv or .parquet)")
+    parser.add_argument('-o', '--output', required=True, help="Output directory for the years/ and summary/ Parquet parts")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Scenarios per worker task and per part file")
+    parser.add_argument('--restart', action='store_true', help="Discard existing results instead of resuming")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Suppress progress output")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.workers, args.chunk_size, args.restart, not args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark suite: time each stage of a report rerun across scaled scenario sizes.
+
+    python -m planner.bench --lengths 5 20 40 60 --expenses 0 50 200 --accounts 1 3 10 -o bench.csv
+    python -m planner.bench --compare bench.csv --tolerance 1.25
+
+Stages mirror the app: projection (accounts, incomes, expenses and assemble, or with
+--monthly the monthly ledger and its annual rollup), chart data, hover text, figure
+construction, and serialization of the figures to the JSON that st.plotly_chart and
+st.altair_chart send to the browser. Times are the best of --repeat
+runs; peak memory comes from a separate tracemalloc pass, so tracing does not skew them.
+With --compare, exits non-zero if any scenario's total time regressed past the tolerance.
+"""
+import argparse
+import sys
+from itertools import product
+
+import pandas as pd
+
+from planner import charts
+from planner.engine import Account, Expense, account_streams, assemble, expense_stream, income_stream, timeline
+from planner.ledger import project_monthly
+from planner.loans import loan_schedule
+from planner.scenario import scenario_inputs
+from planner.timing import StageTimer
+
+STAGES = ['accounts', 'incomes', 'expenses', 'assemble', 'monthly ledger', 'annual rollup', 'chart data', 'hover text', 'cash flow figure', 'composition charts', 'serialize']
+SIZE_COLUMNS = ['forecast_length', 'n_expenses', 'n_accounts', 'lite', 'monthly']
+
+
+# --- SCENARIOS ---
+def make_inputs(forecast_length=40, n_expenses=0, n_accounts=3):
+    # The app's default plan, scaled to the given horizon and numbers of expenses and accounts.
+    assumptions, _, incomes, _ = scenario_inputs({'forecast_length': forecast_length})
+    start = assumptions.current_age
+    accounts = [Account(f"Account {i + 1}", 10_000 * (i + 1), 100 + 50 * i, assumptions.retirement_age, 4.0, rmd=(i == 0)) for i in range(n_accounts)]
+    kinds = [
+        lambda i: Expense(f"Loan {i + 1}", "Amortized Loan", 50_000 + 1_000 * i, start + i % 20, 3.0 + i % 5, 400 + 10 * i),
+        lambda i: Expense(f"Recurring {i + 1}", "Constant", 100 + 5 * i, start + i % 10, end_age=start + 10 + i % 40),
+        lambda i: Expense(f"Purchase {i + 1}", "One-Time Cost", 5_000 + 500 * i, start + i % 30),
+    ]
+    expenses = [kinds[i % 3](i) for i in range(n_expenses)]
+    return assumptions, accounts, incomes, expenses
+
+
+# --- PIPELINE ---
+def run_pipeline(assumptions, accounts, incomes, expenses, timer, lite=False, monthly=False):
+    # One cold report rerun, staged like the app's build_report.
+    loan_schedule.cache_clear()
+    if monthly:
+        with timer.stage('monthly ledger'): ledger = project_monthly(assumptions, accounts, incomes, expenses)
+        with timer.stage('annual rollup'): forecast = ledger.forecast()
+    else:
+        years, ages = timeline(assumptions)
+        with timer.stage('accounts'): accts = account_streams(assumptions, accounts, ages) if accounts else []
+        with timer.stage('incomes'): incs = [income_stream(i, ages) for i in incomes]
+        with timer.stage('expenses'): exps = [expense_stream(e, ages) for e in expenses]
+        with timer.stage('assemble'): forecast = assemble(years, ages, accts, incs, exps)
+    figures = charts.report_figures(forecast, lite, timer)
+    with timer.stage('serialize'):
+        payload = len(figures['cash_flow_fig'].to_json()) + sum(len(figures[k].to_json()) for k in ('income_chart', 'expense_chart', 'asset_chart'))
+    return forecast, payload
+
+
+def bench_size(forecast_length, n_expenses, n_accounts, lite=False, monthly=False, repeat=3, memory=True):
+    inputs = make_inputs(forecast_length, n_expenses, n_accounts)
+    best = {}
+    for _ in range(repeat):
+        timer = StageTimer(); _, payload = run_pipeline(*inputs, timer, lite, monthly)
+        best = {s: min(best.get(s, float('inf')), ms) for s, ms in timer.ms.items()}
+    peak = {}
+    if memory:
+        timer = StageTimer(track_memory=True); run_pipeline(*inputs, timer, lite, monthly); peak = timer.peak_mb
+    size = {'forecast_length': forecast_length, 'n_expenses': n_expenses, 'n_accounts': n_accounts, 'lite': lite, 'monthly': monthly}
+    return [{**size, 'stage': s, 'ms': best[s], 'peak_mb': peak.get(s), 'payload_kb': payload / 1024} for s in STAGES if s in best]
+
+
+def run(lengths=(5, 20, 40, 60), expenses=(0, 10, 50, 200), accounts=(1, 3, 10), lite=(False,), monthly=(False,), repeat=3, memory=True, progress=True):
+    rows = []
+    for size in product(lengths, expenses, accounts, lite, monthly):
+        stages = bench_size(*size, repeat=repeat, memory=memory); rows.extend(stages)
+        if progress: print(f"[bench] length={size[0]} expenses={size[1]} accounts={size[2]} lite={size[3]} monthly={size[4]}: {sum(r['ms'] for r in stages):,.1f} ms", file=sys.stderr, flush=True)
+    return pd.DataFrame(rows)
+
+
+# --- REPORTING ---
+def summary_table(results):
+    # One row per scenario size: ms per stage, total ms, peak MB of the heaviest stage and payload size.
+    table = results.pivot_table(index=SIZE_COLUMNS, columns='stage', values='ms', sort=False)[[s for s in STAGES if s in set(results['stage'])]]
+    table['total ms'] = table.sum(axis=1)
+    grouped = results.groupby(SIZE_COLUMNS, sort=False)
+    if results['peak_mb'].notna().any(): table['peak MB'] = grouped['peak_mb'].max()
+    table['payload KB'] = grouped['payload_kb'].first()
+    return table
+
+
+def compare(results, baseline, tolerance=1.25):
+    # Scenario sizes whose total time exceeds `tolerance` times the baseline's.
+    current, previous = summary_table(results)['total ms'], summary_table(baseline)['total ms']
+    joined = pd.concat({'baseline ms': previous, 'current ms': current}, axis=1, join='inner')
+    joined['ratio'] = joined['current ms'] / joined['baseline ms']
+    return joined[joined['ratio'] > tolerance]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m planner.bench", description="Time and profile each stage of the forecast pipeline at scaled scenario sizes.")
+    parser.add_argument('--lengths', type=int, nargs='+', default=[5, 20, 40, 60], help="Forecast lengths in years")
+    parser.add_argument('--expenses', type=int, nargs='+', default=[0, 10, 50, 200], help="Numbers of expenses")
+    parser.add_argument('--accounts', type=int, nargs='+', default=[1, 3, 10], help="Numbers of investment accounts")
+    parser.add_argument('--lite', action='store_true', help="Also benchmark lightweight chart mode")
+    parser.add_argument('--monthly', action='store_true', help="Also benchmark the monthly ledger")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Runs per size; the fastest is reported")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument('-o', '--output', help="Write per-stage results to this CSV file")
+    parser.add_argument('--compare', help="Baseline CSV from an earlier run; exit 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Allowed slowdown ratio against the baseline")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Suppress progress output")
+    args = parser.parse_args(argv)
+
+    results = run(args.lengths, args.expenses, args.accounts, (False, True) if args.lite else (False,), (False, True) if args.monthly else (False,), args.repeat, not args.no_memory, not args.quiet)
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:,.1f}'.format): print(summary_table(results))
+    if args.output: results.to_csv(args.output, index=False)
+    if args.compare:
+        regressions = compare(results, pd.read_csv(args.compare), args.tolerance)
+        if not regressions.empty:
+            print(f"\nRegressions beyond {args.tolerance:.2f}x baseline:\n{regressions}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import dataclasses
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# --- KEYS ---
+def _canonical(obj):
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type): return dataclasses.asdict(obj)
+    if isinstance(obj, np.generic): return obj.item()
+    if isinstance(obj, (set, frozenset)): return sorted(obj)
+    raise TypeError(f"Cannot hash {type(obj).__name__} into a scenario key")
+
+
+def scenario_key(*parts):
+    # Stable across processes and sessions: equal inputs always produce the same key.
+    payload = json.dumps(parts, default=_canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# --- CACHE ---
+class ForecastCache:
+    # Thread-safe, size-bounded LRU cache shared by every session in the process.
+    def __init__(self, maxsize=256):
+        self.maxsize, self.hits, self.misses = maxsize, 0, 0
+        self._entries = OrderedDict(); self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1; self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value; self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self.hits = self.misses = 0
+
+    def __len__(self): return len(self._entries)
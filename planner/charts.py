@@ -0,0 +1,127 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from planner.timing import StageTimer
+
+TOTAL_COLS = ['Total Expenses', 'Net Annual Cash Flow', 'Total Income']
+# Past this many series the lightweight mode folds the smallest of a group into "Other", keeping the
+# payload sent to the browser bounded. Forecasts have at most 61 yearly points, so points are never thinned.
+LITE_MAX_SERIES = 12
+
+
+# --- DATA ---
+def _reduce(names, values, max_series, other_name):
+    # Keeps the `max_series - 1` largest series by total magnitude and sums the rest into one.
+    if max_series is None or len(names) <= max_series: return names, values
+    keep = np.sort(np.argsort(-np.abs(values).sum(axis=0), kind='stable')[:max_series - 1])
+    rest = np.setdiff1d(np.arange(len(names)), keep)
+    return [names[i] for i in keep] + [other_name], np.column_stack([values[:, keep], values[:, rest].sum(axis=1)])
+
+
+def long_frame(forecast, lite=False):
+    # One long-format (Age, Source, Value, Group) frame shared by every chart of the report.
+    df = forecast.df; ages = df['Age'].to_numpy()
+    groups = [('income', forecast.income_cols, "Other Income"), ('expense', forecast.expense_cols, "Other Expenses"), ('asset', forecast.asset_cols, "Other Accounts"), ('total', TOTAL_COLS, None)]
+    parts = []
+    for group, cols, other_name in groups:
+        if not cols: continue
+        names, values = _reduce(list(cols), df[cols].to_numpy(), LITE_MAX_SERIES if lite and other_name else None, other_name)
+        parts.append(pd.DataFrame({'Age': np.tile(ages, len(names)), 'Source': np.repeat(names, len(ages)), 'Value': values.T.ravel(), 'Group': group}))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['Age', 'Source', 'Value', 'Group'])
+
+
+def hover_text(long_df):
+    # Income breakdown per age for the 'Total Income' tooltip, built column-wise with vectorized string ops.
+    income = long_df[(long_df['Group'] == 'income') & (long_df['Value'] > 0)]
+    amounts = income['Value'].round().astype('int64').astype(str).str.replace(r'\B(?=(\d{3})+(?!\d))', ',', regex=True)
+    lines = ("<b>" + income['Source'] + ":</b> $" + amounts).groupby(income['Age'], sort=False).agg('<br>'.join)
+    return lines.reindex(long_df.loc[long_df['Group'] == 'total', 'Age'].unique(), fill_value='')
+
+
+# --- CASH FLOW ---
+def cash_flow_figure(forecast, long_df=None, lite=False, hover=None):
+    long_df = long_frame(forecast, lite) if long_df is None else long_df
+    hover = hover_text(long_df) if hover is None else hover
+    series = long_df[long_df['Group'].isin(['income', 'total'])]
+    sources = [s for s in series['Source'].unique() if s not in TOTAL_COLS] + TOTAL_COLS
+    palette = px.colors.qualitative.Plotly; color_map = {s: palette[i % len(palette)] for i, s in enumerate(sources)}
+    Scatter = go.Scattergl if lite else go.Scatter
+
+    main_hovertemplate = "<b><u>%{fullData.name}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<extra></extra>"
+    total_income_hovertemplate = "<b><u>%{fullData.name}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<br><br><b>Income Breakdown:</b><br>%{customdata}<extra></extra>"
+    traces = []
+    for source, trace_df in series.groupby('Source', sort=False):
+        if source == 'Total Income': traces.append(Scatter(x=trace_df['Age'].to_numpy(), y=trace_df['Value'].to_numpy(), name=source, mode='lines', line=dict(color=color_map[source]), customdata=hover.to_numpy(), hovertemplate=total_income_hovertemplate))
+        else: traces.append(Scatter(x=trace_df['Age'].to_numpy(), y=trace_df['Value'].to_numpy(), name=source, mode='lines', line=dict(color=color_map[source]), hovertemplate=main_hovertemplate))
+
+    event_df = pd.DataFrame(forecast.events)
+    if not event_df.empty:
+        event_df = event_df[event_df['Age'].isin(forecast.df['Age']) & event_df['Value'].notna()]
+        for source, source_events in event_df.groupby('Source', sort=False):
+            traces.append(Scatter(
+                x=source_events['Age'].to_numpy(), y=source_events['Value'].to_numpy(), name=source, mode='markers', customdata=source_events['Event'].to_numpy(), showlegend=False,
+                marker=dict(size=12, symbol='diamond', color=color_map.get(source), line=dict(width=2, color='DarkSlateGrey')),
+                hovertemplate="<b><u>Event: %{customdata}</u></b><br><b>Age:</b> %{x}<br><b>Amount:</b> %{y:$,.0f}<extra></extra>",
+            ))
+    fig = go.Figure(traces)
+    fig.update_layout(title_text="Annual Cash Flow Over Time", xaxis_title="Your Age", yaxis_title="Annual Cash Flow", yaxis_tickformat='$,.0f', legend_title_text='Cash Flow Source')
+    return fig
+
+
+# --- COMPOSITION ---
+def income_composition_chart(forecast, long_df=None, lite=False):
+    long_df = long_frame(forecast, lite) if long_df is None else long_df
+    income = long_df[(long_df['Group'] == 'income') & (long_df['Value'] > 0)]
+    return alt.Chart(income[['Age', 'Source', 'Value']]).mark_area(opacity=0.8).encode(x=alt.X('Age:O', title=""), y=alt.Y('Value:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Source:N').properties(title="Income Composition")
+
+
+def expense_composition_chart(forecast, long_df=None, lite=False):
+    long_df = long_frame(forecast, lite) if long_df is None else long_df
+    expense = long_df[(long_df['Group'] == 'expense') & (long_df['Value'] < 0)]
+    expense = pd.DataFrame({'Age': expense['Age'], 'Expense': expense['Source'], 'Cost': -expense['Value']})
+    return alt.Chart(expense).mark_area(opacity=0.8).encode(x=alt.X('Age:O'), y=alt.Y('Cost:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Expense:N').properties(title="Expense Composition")
+
+
+def asset_composition_chart(forecast, long_df=None, lite=False):
+    long_df = long_frame(forecast, lite) if long_df is None else long_df
+    assets = long_df[long_df['Group'] == 'asset']
+    assets = pd.DataFrame({'Age': assets['Age'], 'Account': assets['Source'], 'Balance': assets['Value']})
+    return alt.Chart(assets).mark_area(opacity=0.8).encode(x=alt.X('Age:O'), y=alt.Y('Balance:Q', stack='zero', axis=alt.Axis(format='$,.0f')), color='Account:N').properties(title="Asset Composition")
+
+
+def report_figures(forecast, lite=False, timer=None):
+    # Builds every forecast chart from a single long-format frame.
+    timer = timer or StageTimer()
+    with timer.stage('chart data'): long_df = long_frame(forecast, lite)
+    with timer.stage('hover text'): hover = hover_text(long_df)
+    with timer.stage('cash flow figure'): cash_flow_fig = cash_flow_figure(forecast, long_df, lite, hover)
+    with timer.stage('composition charts'):
+        return {
+            'cash_flow_fig': cash_flow_fig,
+            'income_chart': income_composition_chart(forecast, long_df),
+            'expense_chart': expense_composition_chart(forecast, long_df),
+            'asset_chart': asset_composition_chart(forecast, long_df),
+        }
+
+
+# --- MONTE CARLO ---
+def fan_figure(mc):
+    bands = mc.bands
+    fig = go.Figure([
+        go.Scatter(x=bands.index, y=bands['P95'], line=dict(width=0), showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=bands.index, y=bands['P5'], fill='tonexty', fillcolor='rgba(99,110,250,0.15)', line=dict(width=0), name='5th-95th Percentile', hoverinfo='skip'),
+        go.Scatter(x=bands.index, y=bands['P75'], line=dict(width=0), showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=bands.index, y=bands['P25'], fill='tonexty', fillcolor='rgba(99,110,250,0.35)', line=dict(width=0), name='25th-75th Percentile', hoverinfo='skip'),
+        go.Scatter(x=bands.index, y=bands['P50'], line=dict(color='rgb(99,110,250)', width=3), name='Median', hovertemplate="<b>Age:</b> %{x}<br><b>Median:</b> %{y:$,.0f}<extra></extra>"),
+    ])
+    fig.update_layout(title_text="Total Assets Across Simulated Paths (Today's Dollars)", xaxis_title="Your Age", yaxis_title="Total Assets", yaxis_tickformat='$,.0f')
+    return fig
+
+
+def depletion_chart(mc):
+    depletion_dist = mc.depletion_distribution()
+    if depletion_dist.empty: return None
+    return alt.Chart(depletion_dist).mark_bar().encode(x=alt.X('Age:O'), y=alt.Y('Share of Paths:Q', axis=alt.Axis(format='%'))).properties(title="Portfolio Depletion Age Distribution")
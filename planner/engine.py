@@ -0,0 +1,288 @@
+import datetime
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+import pandas as pd
+
+from planner.loans import expense_schedule
+
+EXPENSE_TYPES = ["Amortized Loan", "Constant", "One-Time Cost"]
+
+
+# --- INPUTS ---
+@dataclass
+class Assumptions:
+    current_age: int = 30
+    retirement_age: float = 65
+    forecast_length: int = 40
+    investment_return: float = 7.0
+    inflation_rate: float = 2.5
+    rmd_start_age: float = 75
+    start_year: int = field(default_factory=lambda: datetime.date.today().year)
+
+
+@dataclass
+class Account:
+    name: str
+    balance: float = 0.0
+    monthly_contrib: float = 0.0
+    wd_start_age: float = 65
+    wd_rate: float = 4.0
+    rmd: bool = False
+
+
+@dataclass
+class Income:
+    name: str
+    amount: float = 0.0
+    growth: float = 0.0
+    start_age: float | None = None
+    end_age: float | None = None
+
+
+@dataclass
+class Expense:
+    name: str
+    type: str = "Amortized Loan"
+    balance: float = 0.0
+    start_age: float = 35
+    rate: float = 0.0
+    payment: float = 0.0
+    end_age: float = 120
+    extra_payment: float = 0.0
+    rate_resets: tuple = ()
+
+    def __post_init__(self):
+        # (age, new annual rate %) pairs; stored as a tuple so the expense stays hashable.
+        self.rate_resets = tuple((float(age), float(rate)) for age, rate in self.rate_resets or ())
+
+    @classmethod
+    def from_dict(cls, d):
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+
+# --- OUTPUT ---
+@dataclass
+class Forecast:
+    df: pd.DataFrame
+    events: list
+    asset_cols: list
+    drawdown_cols: list
+    income_cols: list
+    expense_cols: list
+    total_contributions: float
+
+
+# --- HELPERS ---
+def _compound(start, growth, flows):
+    # Solves b[t] = b[t-1] * growth[t] + flows[t] along axis 0, with b[0] = start.
+    growth = np.array(growth, dtype=float); flows = np.array(flows, dtype=float)
+    growth[0] = 1.0; flows[0] = start
+    if (growth > 0).all():
+        factor = np.cumprod(growth, axis=0)
+        return factor * np.cumsum(flows / factor, axis=0)
+    bal = np.empty_like(flows); bal[0] = flows[0]
+    for t in range(1, len(bal)): bal[t] = bal[t - 1] * growth[t] + flows[t]
+    return bal
+
+
+def project_accounts(assumptions, accounts, ages, returns=None):
+    # Returns (balances, drawdowns, contributions) shaped (years, accounts), or
+    # (years, paths, accounts) when `returns` is a (years, paths) array of annual rates.
+    r = assumptions.investment_return / 100 if returns is None else np.asarray(returns, dtype=float)[..., None]
+    pre = (ages < assumptions.retirement_age)[:, None]
+    monthly = np.array([a.monthly_contrib for a in accounts], dtype=float)
+    wd_start = np.array([a.wd_start_age for a in accounts], dtype=float)
+    wd_rate = np.array([a.wd_rate for a in accounts], dtype=float) / 100
+    rmd = np.array([a.rmd for a in accounts], dtype=bool)
+    drawing = ~pre & ((ages[:, None] >= wd_start) | (rmd & (ages[:, None] >= assumptions.rmd_start_age)))
+    contrib = np.where(pre, monthly * 12, 0.0); contrib[0] = 0.0
+    wd = np.where(drawing, wd_rate, 0.0); wd[0] = 0.0
+    flows = contrib
+    if np.ndim(r) == 3: flows, wd = contrib[:, None], wd[:, None]
+    shape = np.broadcast_shapes(np.shape(r), wd.shape)
+    growth = np.broadcast_to(1 + r, shape)
+    balances = _compound(np.array([a.balance for a in accounts], dtype=float), growth * (1 - wd), np.broadcast_to(flows, shape))
+    drawdowns = np.zeros_like(balances)
+    drawdowns[1:] = balances[:-1] * growth[1:] * wd[1:]
+    return balances, drawdowns, contrib
+
+
+def income_series(income, ages):
+    idx = np.arange(len(ages))
+    active = np.ones(len(ages), dtype=bool)
+    if income.start_age is not None: active &= ages >= income.start_age
+    if income.end_age is not None: active &= ages < income.end_age
+    return np.where(active, income.amount * (1 + income.growth / 100) ** idx, 0.0)
+
+
+def expense_series(expense, ages):
+    # Returns the (negative) annual cost series and the events the expense produces. A one-time cost
+    # or loan starting mid-year is charged from the year of age in which it starts.
+    name, start_age, balance = expense.name, expense.start_age, expense.balance
+    start_year = int(np.floor(start_age)); values, events = np.zeros(len(ages)), []
+    if expense.type == 'One-Time Cost':
+        hit = ages == start_year
+        if hit.any(): values[hit] = -balance; events.append({'Age': start_year, 'Value': -balance, 'Event': f'{name} Occurs', 'Source': 'Total Expenses'})
+    elif expense.type == 'Constant':
+        values[(ages >= start_age) & (ages < expense.end_age)] = -(balance * 12)
+    elif expense.type == 'Amortized Loan':
+        schedule = expense_schedule(expense)
+        if schedule is not None:
+            annual = schedule.annual_payments(); lo = start_year - int(ages[0])
+            a0, a1 = max(lo, 0), min(lo + len(annual), len(ages))
+            if a1 > a0: values[a0:a1] = -annual[a0 - lo:a1 - lo]
+            # The last row charged; a mid-year loan's final payment may fall in the following year of age.
+            payoff_age = start_year + len(annual) - 1 if schedule.paid_off else None
+            if start_year in ages: events.append({'Age': start_year, 'Value': -annual[0], 'Event': f'{name} Begins', 'Source': 'Total Expenses'})
+            if payoff_age is not None and payoff_age in ages: events.append({'Age': payoff_age, 'Value': values[ages == payoff_age][0], 'Event': f'{name} Paid Off', 'Source': 'Total Expenses'})
+    return values, events
+
+
+# --- STREAMS ---
+@dataclass
+class Stream:
+    columns: dict
+    income: list = field(default_factory=list)
+    events: list = field(default_factory=list)
+    contributions: float = 0.0
+
+
+def account_streams(assumptions, accounts, ages):
+    balances, drawdowns, contrib = project_accounts(assumptions, accounts, ages)
+    streams = []
+    for j, account in enumerate(accounts):
+        dcol = f"{account.name} Drawdown"; first = np.flatnonzero(drawdowns[:, j] > 0)
+        events = [{'Age': int(ages[first[0]]), 'Value': float(drawdowns[first[0], j]), 'Event': f'{dcol} Begins', 'Source': dcol}] if first.size else []
+        streams.append(Stream({account.name: balances[:, j], dcol: drawdowns[:, j]}, [dcol], events, float(contrib[:, j].sum())))
+    return streams
+
+
+def income_stream(income, ages):
+    # Events mark the last and first whole years of age in which the income is paid.
+    series = income_series(income, ages); events = []
+    last = None if income.end_age is None else int(np.ceil(income.end_age)) - 1
+    first = None if income.start_age is None else int(np.ceil(income.start_age))
+    if last is not None and last in ages: events.append({'Age': last, 'Value': series[ages == last][0], 'Event': f'{income.name} Ends', 'Source': income.name})
+    if first is not None and first in ages: events.append({'Age': first, 'Value': series[ages == first][0], 'Event': f'{income.name} Begins', 'Source': income.name})
+    return Stream({income.name: series}, [income.name], events)
+
+
+def expense_stream(expense, ages):
+    if not isinstance(expense, Expense): expense = Expense.from_dict(expense)
+    values, events = expense_series(expense, ages)
+    return Stream({expense.name: values}, [], events)
+
+
+# --- AGGREGATES ---
+def income_total(account_streams, income_streams, n):
+    columns = {c: v for s in income_streams + account_streams for c, v in s.columns.items() if c in s.income}
+    income_cols = [c for c in dict.fromkeys(c for s in income_streams + account_streams for c in s.income) if columns[c].sum() != 0]
+    return income_cols, (np.sum([columns[c] for c in income_cols], axis=0) if income_cols else np.zeros(n))
+
+
+def expense_total(expense_streams, n):
+    columns = {}
+    for s in expense_streams:
+        for c, v in s.columns.items(): columns[c] = columns[c] + v if c in columns else v
+    return columns, (np.sum(list(columns.values()), axis=0) if columns else np.zeros(n))
+
+
+def forecast_frame(years, ages, names, columns):
+    # One 2-D block is far cheaper to build than a frame of many 1-D columns.
+    df = pd.DataFrame(np.column_stack([columns[c] for c in names]).astype(float), index=years, columns=names); df.insert(0, 'Age', ages)
+    return df
+
+
+def assemble(years, ages, account_streams, income_streams, expense_streams, income=None, expenses=None, frame=forecast_frame):
+    # Builds the forecast from per-stream results; precomputed aggregates may be passed in, and
+    # `frame` may patch an earlier frame instead of building the DataFrame anew.
+    n = len(ages)
+    income_cols, total_income = income or income_total(account_streams, income_streams, n)
+    expense_columns, total_expenses = expenses or expense_total(expense_streams, n)
+    columns = {'Age': ages}
+    for s in account_streams + income_streams: columns.update(s.columns)
+    columns['Total Expenses'] = total_expenses; columns.update(expense_columns)
+    columns['Total Income'] = total_income
+    columns['Net Annual Cash Flow'] = total_income + total_expenses
+
+    asset_cols = [c for s in account_streams for c in s.columns if c not in s.income]
+    drawdown_cols = [c for s in account_streams for c in s.income]
+    events = [e for s in income_streams + account_streams + expense_streams for e in s.events]
+    df = frame(years, ages, list(columns)[1:], columns)
+    return Forecast(df, events, asset_cols, drawdown_cols, income_cols, list(expense_columns), sum(s.contributions for s in account_streams))
+
+
+# --- PROJECTION ---
+def timeline(assumptions):
+    n = assumptions.forecast_length + 1
+    return assumptions.start_year + np.arange(n), assumptions.current_age + np.arange(n)
+
+
+def project(assumptions, accounts=(), incomes=(), expenses=()):
+    years, ages = timeline(assumptions)
+    accounts = list(accounts)
+    return assemble(years, ages, account_streams(assumptions, accounts, ages) if accounts else [], [income_stream(i, ages) for i in incomes], [expense_stream(e, ages) for e in expenses])
+
+
+def project_totals(assumptions, accounts=(), incomes=(), expenses=()):
+    # Aggregate series only, without building the DataFrame; for batch and solver runs.
+    years, ages = timeline(assumptions); n = len(ages)
+    accounts = list(accounts)
+    accts = account_streams(assumptions, accounts, ages) if accounts else []
+    incs = [income_stream(i, ages) for i in incomes]; exps = [expense_stream(e, ages) for e in expenses]
+    _, total_income = income_total(accts, incs, n); _, total_expenses = expense_total(exps, n)
+    return {
+        'Year': years, 'Age': ages,
+        'Total Assets': sum((v for s in accts for c, v in s.columns.items() if c not in s.income), np.zeros(n)),
+        'Total Drawdowns': sum((s.columns[c] for s in accts for c in s.income), np.zeros(n)),
+        'Total Income': total_income, 'Total Expenses': total_expenses, 'Net Annual Cash Flow': total_income + total_expenses,
+    }, sum(s.contributions for s in accts)
+
+
+def funded_portfolio(assets, net, ages, retirement_age, growth):
+    # Portfolio after paying post-retirement cash shortfalls out of it; arrays are (years,) or (years, paths).
+    # Money withdrawn stops earning, so the shortfalls are compounded at the portfolio's growth factor
+    # (1 + return, a scalar or per path and year) before being subtracted.
+    retired = (ages >= retirement_age).reshape((-1,) + (1,) * (np.ndim(assets) - 1))
+    shortfall = np.where(retired, np.maximum(-net, 0.0), 0.0)
+    return assets - _compound(shortfall[0], np.broadcast_to(growth, shortfall.shape), shortfall)
+
+
+def depletion_ages(portfolio, ages, retirement_age):
+    # First age after retirement with nothing left, per path (NaN where never depleted).
+    depleted = (ages > retirement_age).reshape((-1,) + (1,) * (np.ndim(portfolio) - 1)) & (portfolio <= 0)
+    return np.where(depleted.any(axis=0), ages[depleted.argmax(axis=0)], np.nan)
+
+
+# --- SUMMARY ---
+def summarize_totals(totals, retirement_age, total_contributions, investment_return):
+    # Rows are whole years of age. A mid-year retirement is reported at the start of the year it falls
+    # in, and that mixed year counts toward neither the five working years nor the retired years.
+    ages, income, assets = totals['Age'], totals['Total Income'], totals['Total Assets']
+    retirement_year = np.floor(retirement_age)
+    retired, pre_ret = ages >= np.ceil(retirement_age), (ages >= retirement_year - 5) & (ages < retirement_year)
+    ret_income_avg = income[retired].mean() if retired.any() else np.nan
+    pre_ret_income_avg = income[pre_ret].mean() if pre_ret.any() else np.nan
+    depleted = (ages > retirement_age) & (assets <= 0); millionaire = assets >= 1_000_000
+    funded = funded_portfolio(assets, totals['Net Annual Cash Flow'], ages, retirement_age, 1 + investment_return / 100) if 'Net Annual Cash Flow' in totals else assets
+    funded_depletion = depletion_ages(funded, ages, retirement_age)
+    return {
+        'net_worth_at_retirement': float(assets[ages == retirement_year].sum()),
+        'avg_retirement_income': float(ret_income_avg),
+        'replacement_ratio': float((ret_income_avg / pre_ret_income_avg) * 100) if pre_ret_income_avg > 0 else 0.0,
+        'total_contributions': float(total_contributions),
+        'total_growth': float(assets[-1] - assets[0] - total_contributions),
+        'starting_assets': float(assets[0]), 'ending_assets': float(assets[-1]),
+        'depletion_age': int(ages[depleted][0]) if depleted.any() else None,
+        'million_age': int(ages[millionaire][0]) if millionaire.any() else None,
+        'funded_depletion_age': None if np.isnan(funded_depletion) else int(funded_depletion),
+        'funded_ending_assets': float(funded[-1]),
+    }
+
+
+def summarize(forecast, retirement_age, investment_return):
+    df = forecast.df
+    totals = {'Age': df['Age'].to_numpy(), 'Total Income': df['Total Income'].to_numpy(), 'Total Assets': df[forecast.asset_cols].to_numpy().sum(axis=1), 'Net Annual Cash Flow': df['Net Annual Cash Flow'].to_numpy()}
+    return summarize_totals(totals, retirement_age, forecast.total_contributions, investment_return)
@@ -0,0 +1,70 @@
+from collections import Counter
+
+import numpy as np
+
+from planner.engine import Expense, account_streams, assemble, expense_stream, expense_total, income_stream, income_total, forecast_frame, timeline
+from planner.timing import StageTimer
+
+
+class ForecastGraph:
+    # Incremental forecast: each income, expense and account is a node keyed on its own
+    # inputs, feeding the 'Total Income', 'Total Expenses' and 'Net Annual Cash Flow'
+    # aggregates. update() only recomputes nodes whose inputs changed, applies them to the
+    # aggregates as a delta and rewrites only their columns of the previous forecast frame.
+    def __init__(self):
+        self._nodes, self._order, self._totals = {}, {}, {}
+        self._expense_streams, self._axis, self._frame = [], None, None
+        self.recomputed = []
+
+    def _resolve(self, kind, deps, items, compute):
+        keys = [(kind, deps, tuple(vars(item).values())) for item in items]
+        nodes = {}
+        for key, item in zip(keys, items):
+            if key in nodes: continue
+            if key in self._nodes: nodes[key] = self._nodes[key]
+            else: nodes[key] = compute(item); self.recomputed.append((kind, item.name))
+        changed = keys != self._order.get(kind)
+        self._order[kind] = keys
+        return [nodes[k] for k in keys], nodes, changed
+
+    def _expense_total(self, exps, n):
+        # Subtracts the streams that left and adds the ones that joined; a column with a single
+        # stream is exact (v - v == 0), only 'Total Expenses' carries rounding across edits.
+        previous, self._expense_streams = self._expense_streams, exps
+        if len(previous) == len(exps): removed, added = [p for p, e in zip(previous, exps) if p is not e], [e for p, e in zip(previous, exps) if p is not e]
+        else:
+            streams = {id(s): s for s in previous + exps}; counts = Counter(map(id, previous)); counts.subtract(map(id, exps))
+            removed = [streams[i] for i, c in counts.items() for _ in range(max(c, 0))]
+            added = [streams[i] for i, c in counts.items() for _ in range(max(-c, 0))]
+        if 'expenses' not in self._totals or len(self._totals['expenses'][1]) != n or len(removed) + len(added) >= len(exps): return expense_total(exps, n)
+        columns, total = dict(self._totals['expenses'][0]), self._totals['expenses'][1].copy()
+        for sign, streams in ((-1.0, removed), (1.0, added)):
+            for s in streams:
+                for c, v in s.columns.items(): total += sign * v; columns[c] = columns[c] + sign * v if c in columns else v
+        return {c: columns[c] for c in dict.fromkeys(c for s in exps for c in s.columns)}, total
+
+    def _forecast_frame(self, years, ages, names, columns):
+        # Rewrites only the columns whose series changed, in a copy of the previous frame; the copy
+        # is one memcpy of its block and keeps earlier forecasts, which the app may cache, unchanged.
+        if self._frame is None or self._frame[0] != names: df = forecast_frame(years, ages, names, columns)
+        else:
+            _, previous, df = self._frame; df = df.copy()
+            changed = [j for j, c in enumerate(names) if columns[c] is not previous[c]]
+            if changed: df.iloc[:, [j + 1 for j in changed]] = np.column_stack([columns[names[j]] for j in changed])
+        self._frame = (names, columns, df)
+        return df
+
+    def update(self, assumptions, accounts=(), incomes=(), expenses=(), timer=None):
+        years, ages = timeline(assumptions); n = len(ages); self.recomputed = []; timer = timer or StageTimer()
+        axis = (assumptions.start_year, assumptions.current_age, assumptions.forecast_length)
+        if axis != self._axis: self._axis, self._frame = axis, None
+        account_deps = (axis, assumptions.investment_return, assumptions.retirement_age, assumptions.rmd_start_age)
+        with timer.stage('accounts'): accts, acct_nodes, accts_changed = self._resolve('account', account_deps, list(accounts), lambda a: account_streams(assumptions, [a], ages)[0])
+        with timer.stage('incomes'): incs, inc_nodes, incs_changed = self._resolve('income', axis, list(incomes), lambda i: income_stream(i, ages))
+        with timer.stage('expenses'): exps, exp_nodes, exps_changed = self._resolve('expense', axis, [e if isinstance(e, Expense) else Expense.from_dict(e) for e in expenses], lambda e: expense_stream(e, ages))
+        self._nodes = {**acct_nodes, **inc_nodes, **exp_nodes}
+
+        with timer.stage('assemble'):
+            if accts_changed or incs_changed or 'income' not in self._totals: self._totals['income'] = income_total(accts, incs, n)
+            if exps_changed or 'expenses' not in self._totals: self._totals['expenses'] = self._expense_total(exps, n)
+            return assemble(years, ages, accts, incs, exps, income=self._totals['income'], expenses=self._totals['expenses'], frame=self._forecast_frame)
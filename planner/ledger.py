@@ -0,0 +1,140 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from planner.engine import Expense, Stream, _compound, assemble, timeline
+from planner.loans import expense_schedule
+
+
+# --- LEDGER ---
+@dataclass
+class Ledger:
+    # Monthly forecast held in one C-contiguous float64 block shaped (months, streams), laid out as
+    # [account balances | account drawdowns | incomes | expenses]. Balances are taken at the start of
+    # each month; every other column is the cash flow during it. Month m begins at age current_age + m/12.
+    years: np.ndarray
+    year_ages: np.ndarray
+    values: np.ndarray
+    names: list
+    n_accounts: int
+    n_incomes: int
+    contributions: np.ndarray
+    events: list
+
+    @property
+    def ages(self): return self.year_ages[0] + np.arange(len(self.values)) / 12
+
+    def annual(self):
+        # (years, streams): start-of-year balances and flows summed over the year of age. The reshape
+        # is a view of the monthly block, so the annual view costs one (years, streams) array.
+        by_year = self.values.reshape(len(self.years), 12, self.values.shape[1])
+        a = self.n_accounts
+        return np.concatenate([by_year[:, 0, :a], by_year[:, :, a:].sum(axis=1)], axis=1)
+
+    def forecast(self):
+        # The annual Forecast the charts and summary expect, built from the rolled-up ledger.
+        col = self.annual().T; a, i = self.n_accounts, self.n_incomes
+        accts = [Stream({self.names[j]: col[j], self.names[a + j]: col[a + j]}, [self.names[a + j]], [], float(self.contributions[j])) for j in range(a)]
+        incs = [Stream({self.names[k]: col[k]}, [self.names[k]]) for k in range(2 * a, 2 * a + i)]
+        exps = [Stream({self.names[k]: col[k]}) for k in range(2 * a + i, len(self.names))]
+        return replace(assemble(self.years, self.year_ages, accts, incs, exps), events=self.events)
+
+
+# --- HELPERS ---
+def _months(ages, current_age, missing):
+    # First month index at or after each age; None becomes `missing` (e.g. -inf or inf).
+    ages = np.array([missing if a is None else a for a in ages], dtype=float)
+    return np.ceil((ages - current_age) * 12 - 1e-9)
+
+
+def _fill_accounts(assumptions, accounts, month, balances, drawdowns):
+    # b[m+1] = b[m] * (1 + r) * (1 - wd[m]) + contrib[m], with r the monthly rate equivalent to the
+    # annual return, wd a twelfth of the annual drawdown rate and contributions until retirement.
+    r = (1 + assumptions.investment_return / 100) ** (1 / 12) - 1
+    pre = (month < _months([assumptions.retirement_age], assumptions.current_age, np.inf))[:, None]
+    wd_start = _months([a.wd_start_age for a in accounts], assumptions.current_age, np.inf)
+    rmd = np.array([a.rmd for a in accounts], dtype=bool) & (month[:, None] >= _months([assumptions.rmd_start_age], assumptions.current_age, np.inf))
+    wd = np.where(~pre & ((month[:, None] >= wd_start) | rmd), np.array([a.wd_rate for a in accounts], dtype=float) / 100 / 12, 0.0)
+    contrib = np.where(pre, np.array([a.monthly_contrib for a in accounts], dtype=float), 0.0)
+    growth = (1 + r) * (1 - wd)
+    balances[:] = _compound(np.array([a.balance for a in accounts], dtype=float), np.roll(growth, 1, axis=0), np.roll(contrib, 1, axis=0))
+    drawdowns[:] = balances * (1 + r) * wd
+    return contrib.sum(axis=0)
+
+
+def _fill_incomes(incomes, current_age, month, out):
+    # Monthly twelfths of each income, raised on every anniversary of the forecast start.
+    start = _months([i.start_age for i in incomes], current_age, -np.inf)
+    end = _months([i.end_age for i in incomes], current_age, np.inf)
+    amount = np.array([i.amount for i in incomes], dtype=float) / 12
+    growth = 1 + np.array([i.growth for i in incomes], dtype=float) / 100
+    active = (month[:, None] >= start) & (month[:, None] < end)
+    out[:] = np.where(active, amount * growth ** (month // 12)[:, None], 0.0)
+
+
+def _fill_expenses(expenses, current_age, month, out):
+    n = len(month); start = _months([e.start_age for e in expenses], current_age, 0).astype(int)
+    kinds = np.array([e.type for e in expenses])
+    constant = np.flatnonzero(kinds == 'Constant')
+    if constant.size:
+        end = _months([expenses[k].end_age for k in constant], current_age, np.inf)
+        active = (month[:, None] >= start[constant]) & (month[:, None] < end)
+        out[:, constant] = np.where(active, -np.array([expenses[k].balance for k in constant], dtype=float), 0.0)
+    once = np.flatnonzero((kinds == 'One-Time Cost') & (start >= 0) & (start < n))
+    out[start[once], once] = -np.array([expenses[k].balance for k in once], dtype=float)
+
+    # Every loan's monthly payments are scattered into the block with a single assignment.
+    rows, cols, pays, schedules = [], [], [], {}
+    for k in np.flatnonzero(kinds == 'Amortized Loan'):
+        schedule = expense_schedule(expenses[k])
+        if schedule is None: continue
+        schedules[k] = schedule; rows.append(start[k] + np.arange(schedule.months)); cols.append(np.full(schedule.months, k)); pays.append(schedule.payment)
+    if rows:
+        rows, cols, pays = np.concatenate(rows), np.concatenate(cols), np.concatenate(pays)
+        keep = (rows >= 0) & (rows < n); out[rows[keep], cols[keep]] = -pays[keep]
+    return start, schedules
+
+
+def _events(values, names, n_accounts, incomes, expenses, current_age, year_ages, expense_start, schedules):
+    # Same events as the annual engine, placed in the year of age in which their month falls.
+    n = len(values); nz = values != 0
+    has, first, last = nz.any(axis=0), nz.argmax(axis=0), n - 1 - nz[::-1].argmax(axis=0)
+    row_total = lambda col, m: float(values[m - m % 12:m - m % 12 + 12, col].sum())
+    event = lambda m, value, label, source: {'Age': int(year_ages[m // 12]), 'Value': value, 'Event': label, 'Source': source}
+    events = []
+    for i, income in enumerate(incomes):
+        col = 2 * n_accounts + i
+        if not has[col]: continue
+        if income.end_age is not None and _months([income.end_age], current_age, np.inf)[0] <= n: events.append(event(last[col], row_total(col, last[col]), f'{income.name} Ends', income.name))
+        if income.start_age is not None and _months([income.start_age], current_age, -np.inf)[0] >= 0: events.append(event(first[col], row_total(col, first[col]), f'{income.name} Begins', income.name))
+    for j in range(n_accounts):
+        col = n_accounts + j
+        if has[col]: events.append(event(first[col], row_total(col, first[col]), f'{names[col]} Begins', names[col]))
+    offset = 2 * n_accounts + len(incomes)
+    for k, expense in enumerate(expenses):
+        col, m = offset + k, expense_start[k]
+        if expense.type == 'One-Time Cost' and 0 <= m < n: events.append(event(m, -expense.balance, f'{expense.name} Occurs', 'Total Expenses'))
+        elif k in schedules:
+            if 0 <= m < n: events.append(event(m, row_total(col, m), f'{expense.name} Begins', 'Total Expenses'))
+            end = m + schedules[k].months - 1
+            if schedules[k].paid_off and 0 <= end < n: events.append(event(end, row_total(col, end), f'{expense.name} Paid Off', 'Total Expenses'))
+    return events
+
+
+# --- PROJECTION ---
+def project_monthly(assumptions, accounts=(), incomes=(), expenses=()):
+    # Monthly counterpart of engine.project; ages (retirement, drawdown, RMD, income and expense
+    # start/end) may fall mid-year. Returns a Ledger; call .forecast() for the annual view.
+    years, year_ages = timeline(assumptions)
+    accounts, incomes = list(accounts), list(incomes)
+    expenses = [e if isinstance(e, Expense) else Expense.from_dict(e) for e in expenses]
+    a, i, current_age = len(accounts), len(incomes), assumptions.current_age
+    month = np.arange(12 * len(years))
+    # Each stage writes straight into its columns of the block, so no stream is copied afterwards.
+    values = np.zeros((len(month), 2 * a + i + len(expenses)))
+    contributions = _fill_accounts(assumptions, accounts, month, values[:, :a], values[:, a:2 * a]) if accounts else np.zeros(0)
+    if incomes: _fill_incomes(incomes, current_age, month, values[:, 2 * a:2 * a + i])
+    expense_start, schedules = _fill_expenses(expenses, current_age, month, values[:, 2 * a + i:]) if expenses else ([], {})
+    names = [x.name for x in accounts] + [f"{x.name} Drawdown" for x in accounts] + [x.name for x in incomes] + [x.name for x in expenses]
+    events = _events(values, names, a, incomes, expenses, current_age, year_ages, expense_start, schedules)
+    return Ledger(years, year_ages, values, names, a, i, contributions, events)
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+MAX_MONTHS = 1200
+
+
+@dataclass(frozen=True)
+class LoanSchedule:
+    # Monthly amortization schedule; month 0 is the first payment, made at start_age.
+    start_age: float
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    balance: np.ndarray
+    paid_off: bool
+
+    @property
+    def months(self): return len(self.payment)
+
+    @property
+    def years_to_payoff(self): return (self.months - 1 + self.payment[-1] / self.payment.max()) / 12 if self.paid_off else None
+
+    @property
+    def payoff_age(self): return int(np.floor(self.start_age + (self.months - 1) / 12 + 1e-9)) if self.paid_off else None
+
+    @property
+    def total_interest(self): return float(self.interest.sum())
+
+    def annual_payments(self):
+        # Total paid in each loan year, starting with the year the loan begins.
+        return np.add.reduceat(self.payment, np.arange(0, self.months, 12)) if self.months else np.zeros(0)
+
+
+def _amortize(balance, rate, payment, extra_payment, rate_resets, start_age, max_months):
+    pay = payment + extra_payment
+    if pay <= 0 or balance <= 0: return None
+    # Annual rate in force each month, switching at every reset age.
+    reset_months = np.array([(age - start_age) * 12 for age, _ in rate_resets], dtype=float)
+    rates = np.array([rate] + [r for _, r in rate_resets], dtype=float) / 100 / 12
+    monthly_rate = rates[np.searchsorted(reset_months, np.arange(max_months), side='right')]
+
+    # Closed form of b[k] = b[k-1] * (1 + r[k]) - pay, evaluated for every month at once.
+    factor = np.cumprod(1 + monthly_rate)
+    with np.errstate(over='ignore', invalid='ignore'): owed = factor * (balance - np.cumsum(pay / factor))
+    done = owed <= 0
+    months = int(done.argmax()) + 1 if done.any() else max_months
+    prev = np.concatenate(([balance], owed[:months - 1]))
+    interest = prev * monthly_rate[:months]
+    payments = np.full(months, float(pay))
+    if done.any(): payments[-1] = prev[-1] + interest[-1]
+    schedule = LoanSchedule(start_age, payments, interest, payments - interest, np.maximum(owed[:months], 0.0), bool(done.any()))
+    for arr in (schedule.payment, schedule.interest, schedule.principal, schedule.balance): arr.flags.writeable = False
+    return schedule
+
+
+@lru_cache(maxsize=4096)
+def loan_schedule(balance, rate, payment, extra_payment=0.0, rate_resets=(), start_age=0, max_months=MAX_MONTHS):
+    # Computed once per distinct loan and shared by the forecast, the summary and the Expenses tab.
+    return _amortize(float(balance), float(rate), float(payment), float(extra_payment), tuple(sorted(rate_resets)), start_age, max_months)
+
+
+def expense_schedule(expense):
+    return loan_schedule(expense.balance, expense.rate, expense.payment, expense.extra_payment, expense.rate_resets, expense.start_age)
@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from planner.engine import Expense, depletion_ages, funded_portfolio, project, project_accounts
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+# --- OUTPUT ---
+@dataclass
+class MonteCarloResult:
+    ages: np.ndarray
+    n_paths: int
+    success_probability: float
+    bands: pd.DataFrame
+    depletion_ages: np.ndarray
+
+    def depletion_distribution(self):
+        depleted = self.depletion_ages[~np.isnan(self.depletion_ages)].astype(int)
+        counts = pd.Series(depleted).value_counts().sort_index()
+        return pd.DataFrame({'Age': counts.index, 'Share of Paths': counts.values / self.n_paths})
+
+
+# --- SIMULATION ---
+def _simulate_chunk(assumptions, accounts, base, n_paths, return_sd, inflation_sd, seed):
+    # Runs one (paths x years) block and returns (real portfolio value as float32, depletion ages).
+    ages, other_income, loans, indexed = base
+    n = len(ages); rng = np.random.default_rng(seed)
+    returns = np.clip(rng.normal(assumptions.investment_return / 100, return_sd / 100, (n, n_paths)), -0.99, None)
+    inflation = rng.normal(assumptions.inflation_rate / 100, inflation_sd / 100, (n, n_paths)); inflation[0] = 0.0
+    if accounts:
+        balances, drawdowns, _ = project_accounts(assumptions, accounts, ages, returns)
+        assets, drawn = balances.sum(axis=2), drawdowns.sum(axis=2)
+    else:
+        assets, drawn = np.zeros((n, n_paths)), np.zeros((n, n_paths))
+
+    # Non-loan expenses move with each path's price level relative to the assumed inflation, so the
+    # average path matches the deterministic plan; loan payments stay fixed in nominal terms.
+    prices = np.cumprod(1 + inflation, axis=0)
+    relative = prices / ((1 + assumptions.inflation_rate / 100) ** np.arange(n))[:, None]
+    # Post-retirement cash shortfalls are funded from the portfolio.
+    net = (other_income + loans)[:, None] + indexed[:, None] * relative + drawn
+    portfolio = funded_portfolio(assets, net, ages, assumptions.retirement_age, 1 + returns)
+    depleted_at = depletion_ages(portfolio, ages, assumptions.retirement_age)
+
+    real = np.maximum(portfolio, 0.0) / prices
+    return real.astype(np.float32), depleted_at
+
+
+def simulate(assumptions, accounts=(), incomes=(), expenses=(), n_paths=10_000, return_sd=12.0, inflation_sd=1.0, seed=None, chunk_size=10_000, workers=1):
+    accounts = list(accounts)
+    expenses = [e if isinstance(e, Expense) else Expense.from_dict(e) for e in expenses]
+    base_df = project(assumptions, [], incomes, [e for e in expenses if e.type == 'Amortized Loan']).df
+    indexed = project(assumptions, [], [], [e for e in expenses if e.type != 'Amortized Loan']).df['Total Expenses'].to_numpy()
+    ages = base_df['Age'].to_numpy()
+    base = (ages, base_df['Total Income'].to_numpy(), base_df['Total Expenses'].to_numpy(), indexed)
+
+    sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(assumptions, accounts, base, size, return_sd, inflation_sd, s) for size, s in zip(sizes, seeds)]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool: chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+
+    real = np.concatenate([c[0] for c in chunks], axis=1)
+    depleted_at = np.concatenate([c[1] for c in chunks])
+    bands = pd.DataFrame(np.percentile(real, PERCENTILES, axis=1).T, index=ages, columns=[f"P{p}" for p in PERCENTILES])
+    bands.index.name = 'Age'
+    return MonteCarloResult(ages, n_paths, float(np.isnan(depleted_at).mean()), bands, depleted_at)
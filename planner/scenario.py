@@ -0,0 +1,65 @@
+import json
+import math
+
+import numpy as np
+
+from planner.engine import Account, Assumptions, Expense, Income
+
+# Field names and defaults mirror the app's widgets, so a saved scenario is just the widget values.
+SCENARIO_DEFAULTS = {
+    'current_age': 30, 'retirement_age': 65, 'forecast_length': 40, 'investment_return': 7.0, 'inflation_rate': 2.5,
+    'inc_job1': True, 'job1_name': "Primary Job", 'job1_income': 75000, 'job1_growth': 3.0,
+    'inc_job2': True, 'job2_name': "Side Hustle", 'job2_income': 15000, 'job2_growth': 2.0,
+    'inc_ss': True, 'ss_name': "Social Security", 'ss_start_age': 67, 'ss_annual_amount': 24000,
+    'inc_pension1': True, 'pension1_name': "Military Pension", 'pension1_start_age': 55, 'pension1_annual_amount': 30000,
+    'inc_pension2': False, 'pension2_name': "Corporate Pension", 'pension2_start_age': 65, 'pension2_annual_amount': 12000,
+    'inc_pretax': True, 'pretax_name': "401(k)/Traditional IRA", 'pretax_balance': 50000, 'pretax_contrib': 500, 'pretax_wd_start': None, 'pretax_wd_rate': 4.0,
+    'inc_roth': True, 'roth_name': "Roth IRA/401(k)", 'roth_balance': 25000, 'roth_contrib': 300, 'roth_wd_start': None, 'roth_wd_rate': 4.0,
+    'inc_brokerage': True, 'brokerage_name': "Taxable Brokerage", 'brokerage_balance': 10000, 'brokerage_contrib': 200, 'brokerage_wd_start': None, 'brokerage_wd_rate': 2.0,
+    'rmd_start_age': 75,
+    'expenses': [],
+}
+# Bounds of the app's "Target Retirement Age" widget; solvers search no further.
+RETIREMENT_AGE_RANGE = (40, 100)
+
+
+def _clean(value):
+    # CSV and Parquet rows carry NaN for missing cells and numpy scalars for the rest.
+    if isinstance(value, np.generic): value = value.item()
+    if isinstance(value, float) and math.isnan(value): return None
+    return value
+
+
+def _age(value):
+    # Whole ages stay ints (CSV columns with blanks parse 65 as 65.0); mid-year ages stay floats.
+    if value is None: return None
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def scenario_inputs(scenario):
+    # Returns (assumptions, accounts, incomes, expenses) for a dict of widget values.
+    s = dict(SCENARIO_DEFAULTS); s.update({k: v for k, v in ((k, _clean(v)) for k, v in scenario.items()) if v is not None})
+    # The timeline is whole years from the current age; the other ages may fall mid-year.
+    for k in ['current_age', 'forecast_length']: s[k] = int(s[k])
+    for k in ['retirement_age', 'rmd_start_age', 'ss_start_age', 'pension1_start_age', 'pension2_start_age', 'pretax_wd_start', 'roth_wd_start', 'brokerage_wd_start']: s[k] = _age(s[k])
+    ret = s['retirement_age']
+    assumptions = Assumptions(current_age=s['current_age'], retirement_age=ret, forecast_length=s['forecast_length'], investment_return=s['investment_return'], inflation_rate=s['inflation_rate'], rmd_start_age=s['rmd_start_age'])
+    if s.get('start_year') is not None: assumptions.start_year = int(s['start_year'])
+
+    accounts = []
+    if s['inc_pretax']: accounts.append(Account(s['pretax_name'], s['pretax_balance'], s['pretax_contrib'], s['pretax_wd_start'] or ret, s['pretax_wd_rate'], rmd=True))
+    if s['inc_roth']: accounts.append(Account(s['roth_name'], s['roth_balance'], s['roth_contrib'], s['roth_wd_start'] or ret, s['roth_wd_rate']))
+    if s['inc_brokerage']: accounts.append(Account(s['brokerage_name'], s['brokerage_balance'], s['brokerage_contrib'], s['brokerage_wd_start'] or ret, s['brokerage_wd_rate']))
+
+    incomes = []
+    if s['inc_job1'] and s['job1_name']: incomes.append(Income(s['job1_name'], s['job1_income'], s['job1_growth'], end_age=ret))
+    if s['inc_job2'] and s['job2_name']: incomes.append(Income(s['job2_name'], s['job2_income'], s['job2_growth'], end_age=ret))
+    if s['inc_ss'] and s['ss_name']: incomes.append(Income(s['ss_name'], s['ss_annual_amount'], start_age=s['ss_start_age']))
+    if s['inc_pension1'] and s['pension1_name']: incomes.append(Income(s['pension1_name'], s['pension1_annual_amount'], start_age=s['pension1_start_age']))
+    if s['inc_pension2'] and s['pension2_name']: incomes.append(Income(s['pension2_name'], s['pension2_annual_amount'], start_age=s['pension2_start_age']))
+
+    expenses = s['expenses']
+    if isinstance(expenses, str): expenses = json.loads(expenses)
+    expenses = [e if isinstance(e, Expense) else Expense.from_dict(e) for e in expenses]
+    return assumptions, accounts, incomes, expenses
@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import pandas as pd
+
+from planner.engine import project_accounts, project_totals, summarize_totals, timeline
+from planner.scenario import RETIREMENT_AGE_RANGE, SCENARIO_DEFAULTS, _clean, scenario_inputs
+
+
+# --- SEARCH ---
+def bisect(ok, lo, hi, tol=1.0, integer=False, find='min'):
+    # Smallest (find='min') or largest (find='max') x in [lo, hi] with ok(x), for a monotone
+    # predicate; None if no point in the range qualifies.
+    if find == 'min' and not ok(hi): return None
+    if find == 'max' and not ok(lo): return None
+    if find == 'min' and ok(lo): return lo
+    if find == 'max' and ok(hi): return hi
+    while (hi - lo > 1) if integer else (hi - lo > tol):
+        mid = (lo + hi) // 2 if integer else (lo + hi) / 2
+        if ok(mid) == (find == 'min'): hi = mid
+        else: lo = mid
+    return hi if find == 'min' else lo
+
+
+# --- EVALUATION ---
+class _AccountEvaluator:
+    # Incomes and expenses stay fixed while a contribution or drawdown is searched, so they are
+    # projected once and each evaluation only recompounds the accounts.
+    def __init__(self, scenario):
+        self.assumptions, self.accounts, incomes, expenses = scenario_inputs(scenario)
+        self.base, _ = project_totals(self.assumptions, [], incomes, expenses)
+
+    def summary(self, accounts):
+        base, ages = self.base, self.base['Age']
+        balances, drawdowns, contrib = project_accounts(self.assumptions, accounts, ages)
+        income = base['Total Income'] + drawdowns.sum(axis=1)
+        totals = {'Age': ages, 'Total Assets': balances.sum(axis=1), 'Total Income': income, 'Net Annual Cash Flow': income + base['Total Expenses']}
+        return summarize_totals(totals, self.assumptions.retirement_age, contrib.sum(), self.assumptions.investment_return)
+
+
+def _never_depletes(summary, min_ending_assets=0.0):
+    return summary['funded_depletion_age'] is None and summary['funded_ending_assets'] >= min_ending_assets
+
+
+def _target_accounts(evaluator, scenario, account):
+    # Index of the engine accounts a goal applies to; 'all' means every included account.
+    names = {key: scenario.get(f"{key}_name") or SCENARIO_DEFAULTS[f"{key}_name"] for key in ('pretax', 'roth', 'brokerage')}
+    idx = [i for i, a in enumerate(evaluator.accounts) if account == 'all' or a.name == names.get(account)]
+    if not idx: raise ValueError(f"Account '{account}' is not included in the forecast")
+    return idx
+
+
+# --- GOALS ---
+def min_monthly_contribution(scenario, account='pretax', max_contribution=50_000, tol=1.0, min_ending_assets=0.0):
+    # Least monthly contribution to `account` (or to each account, for 'all') so the portfolio never depletes.
+    evaluator = _AccountEvaluator(scenario); idx = _target_accounts(evaluator, scenario, account)
+    def ok(amount):
+        accounts = [replace(a, monthly_contrib=amount) if i in idx else a for i, a in enumerate(evaluator.accounts)]
+        return _never_depletes(evaluator.summary(accounts), min_ending_assets)
+    return bisect(ok, 0.0, float(max_contribution), tol=tol)
+
+
+def max_drawdown_rate(scenario, account='all', min_ending_assets=None, tol=0.01):
+    # Highest drawdown %/yr that never depletes the portfolio and leaves at least `min_ending_assets`
+    # (by default, the portfolio's value at retirement) at the end of the forecast.
+    evaluator = _AccountEvaluator(scenario); idx = _target_accounts(evaluator, scenario, account)
+    if min_ending_assets is None: min_ending_assets = evaluator.summary(evaluator.accounts)['net_worth_at_retirement']
+    def ok(rate):
+        accounts = [replace(a, wd_rate=rate) if i in idx else a for i, a in enumerate(evaluator.accounts)]
+        return _never_depletes(evaluator.summary(accounts), min_ending_assets)
+    return bisect(ok, 0.0, 100.0, tol=tol, find='max')
+
+
+def earliest_retirement_age(scenario, min_replacement=70.0, min_age=RETIREMENT_AGE_RANGE[0], max_age=RETIREMENT_AGE_RANGE[1]):
+    # Earliest retirement age whose income replacement ratio reaches `min_replacement` percent,
+    # among the forecast's ages within [min_age, max_age] (by default, the app's widget range).
+    # Pensions and Social Security start at fixed ages, so the ratio rises and falls with the
+    # retirement age; every candidate age is checked rather than bisected. Each account's
+    # drawdown start keeps its offset from the retirement age (none by default, when it starts at
+    # retirement), so drawdowns move with every candidate age.
+    assumptions, *_ = scenario_inputs(scenario)
+    _, ages = timeline(assumptions)
+    offsets = {}
+    for key in ('pretax', 'roth', 'brokerage'):
+        start = _clean(scenario.get(f"{key}_wd_start"))
+        offsets[key] = max(float(start) - assumptions.retirement_age, 0) if start is not None else 0
+    for age in range(max(int(ages[0]) + 1, min_age), min(int(ages[-1]), max_age) + 1):
+        a, accounts, incomes, expenses = scenario_inputs({**scenario, 'retirement_age': age, **{f"{k}_wd_start": age + o for k, o in offsets.items()}})
+        totals, contributions = project_totals(a, accounts, incomes, expenses)
+        if summarize_totals(totals, a.retirement_age, contributions, a.investment_return)['replacement_ratio'] >= min_replacement: return age
+    return None
+
+
+GOALS = {'min_monthly_contribution': min_monthly_contribution, 'max_drawdown_rate': max_drawdown_rate, 'earliest_retirement_age': earliest_retirement_age}
+
+
+# --- BATCH ---
+def _solve_one(args):
+    scenario_id, scenario, goal, kwargs = args
+    try: return {'scenario_id': scenario_id, 'goal': goal, 'result': GOALS[goal](scenario, **kwargs), 'error': ''}
+    except Exception as e: return {'scenario_id': scenario_id, 'goal': goal, 'result': None, 'error': f"{type(e).__name__}: {e}"}
+
+
+def solve_many(scenarios, goal, workers=1, **kwargs):
+    # Runs one goal over many scenarios (dicts, optionally with a 'scenario_id'); returns a DataFrame.
+    args = [(str(s.get('scenario_id', i)), s, goal, kwargs) for i, s in enumerate(scenarios)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool: rows = list(pool.map(_solve_one, args, chunksize=64))
+    else:
+        rows = [_solve_one(a) for a in args]
+    return pd.DataFrame(rows, columns=['scenario_id', 'goal', 'result', 'error'])
@@ -0,0 +1,31 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class StageTimer:
+    # Wall-clock milliseconds per named pipeline stage and, with track_memory, the peak memory
+    # traced while the stage ran. A stage entered more than once accumulates its time.
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.ms, self.peak_mb = {}, {}
+
+    @contextmanager
+    def stage(self, name):
+        if self.track_memory:
+            if not tracemalloc.is_tracing(): tracemalloc.start()
+            tracemalloc.reset_peak(); base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try: yield
+        finally:
+            self.ms[name] = self.ms.get(name, 0.0) + (time.perf_counter() - started) * 1000
+            if self.track_memory: self.peak_mb[name] = max(self.peak_mb.get(name, 0.0), (tracemalloc.get_traced_memory()[1] - base) / 2**20)
+
+    def total_ms(self): return sum(self.ms.values())
+
+    def frame(self):
+        df = pd.DataFrame({'Stage': list(self.ms), 'ms': list(self.ms.values())})
+        if self.track_memory: df['Peak MB'] = [self.peak_mb.get(s, 0.0) for s in self.ms]
+        return df
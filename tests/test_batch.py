@@ -0,0 +1,54 @@
+import json
+
+import pandas as pd
+import pytest
+
+from planner import batch
+
+
+@pytest.fixture
+def scenarios(tmp_path):
+    path = tmp_path / 'scenarios.jsonl'
+    rows = [{'scenario_id': f's{i}', 'retirement_age': 60 + i, 'pretax_contrib': 100 * i, 'expenses': [{'name': 'Loan', 'type': 'Amortized Loan', 'balance': 100000, 'rate': 5.0, 'payment': 900, 'start_age': 35}]} for i in range(10)]
+    rows.append({'scenario_id': 'bad', 'current_age': 'not a number'})
+    path.write_text('\n'.join(json.dumps(r) for r in rows))
+    return path
+
+
+def read(output, sub): return pd.read_parquet(output / sub)
+
+
+def test_run_writes_years_and_summary(scenarios, tmp_path):
+    output = tmp_path / 'out'
+    assert batch.run(scenarios, output, workers=1, chunk_size=3, progress=False) == 11
+    summary, years = read(output, 'summary'), read(output, 'years')
+    assert sorted(summary['scenario_id']) == sorted([f's{i}' for i in range(10)] + ['bad'])
+    assert summary.set_index('scenario_id').loc['bad', 'error'].startswith('ValueError')
+    assert len(years) == 10 * 41 and set(years.columns) == {'scenario_id', 'Year', 'Age', *batch.YEAR_COLUMNS}
+
+
+def test_run_resumes_after_a_part_is_lost(scenarios, tmp_path):
+    output = tmp_path / 'out'
+    batch.run(scenarios, output, workers=1, chunk_size=3, progress=False)
+    before = read(output, 'summary').set_index('scenario_id').sort_index()
+    lost = sorted((output / 'summary').glob('part-*.parquet'))[1]
+    lost_ids = set(pd.read_parquet(lost)['scenario_id']); lost.unlink()
+
+    assert batch.run(scenarios, output, workers=1, chunk_size=3, progress=False) == 11
+    after = read(output, 'summary').set_index('scenario_id').sort_index()
+    pd.testing.assert_frame_equal(before, after)
+    years = read(output, 'years')
+    assert len(years) == 10 * 41 and not years.duplicated(['scenario_id', 'Age']).any()
+    newest = max((output / 'summary').glob('part-*.parquet'))
+    assert set(pd.read_parquet(newest)['scenario_id']) == lost_ids
+
+
+def test_csv_ids_are_kept_as_written(tmp_path):
+    path, output = tmp_path / 'scenarios.csv', tmp_path / 'out'
+    expenses = json.dumps([{'name': 'Car', 'type': 'One-Time Cost', 'balance': 30000, 'start_age': 40}])
+    pd.DataFrame({'scenario_id': ['007', '0042', '', '1e3'], 'retirement_age': [60, 62, 64, None], 'expenses': [expenses, '[]', expenses, '[]']}).to_csv(path, index=False)
+    assert batch.run(path, output, workers=1, chunk_size=2, progress=False) == 4
+    summary = read(output, 'summary').set_index('scenario_id')
+    assert sorted(summary.index) == ['0042', '007', '1e3', '2'] and (summary['error'] == '').all()
+    assert set(read(output, 'years')['scenario_id']) == set(summary.index)
+    assert batch.run(path, output, workers=1, chunk_size=2, progress=False) == 4 and len(list((output / 'summary').glob('part-*.parquet'))) == 2
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from planner import bench
+from planner.timing import StageTimer
+
+
+def test_stage_timer_accumulates_time_and_peak_memory():
+    timer = StageTimer(track_memory=True)
+    with timer.stage('sleep'): time.sleep(0.01)
+    with timer.stage('sleep'): time.sleep(0.01)
+    with timer.stage('alloc'): block = np.ones(2**20); del block
+    assert timer.ms['sleep'] >= 20 and timer.total_ms() == pytest.approx(sum(timer.ms.values()))
+    assert timer.peak_mb['alloc'] >= 8 and timer.peak_mb['sleep'] < 1
+    assert list(timer.frame().columns) == ['Stage', 'ms', 'Peak MB'] and list(timer.frame()['Stage']) == ['sleep', 'alloc']
+    assert 'Peak MB' not in StageTimer().frame().columns
+
+
+def test_stage_timer_records_a_failing_stage():
+    timer = StageTimer()
+    with pytest.raises(ZeroDivisionError):
+        with timer.stage('broken'): 1 / 0
+    assert 'broken' in timer.ms
+
+
+def results(ms_per_stage):
+    return pd.DataFrame([{'forecast_length': length, 'n_expenses': 0, 'n_accounts': 1, 'lite': False, 'monthly': False, 'stage': stage, 'ms': ms, 'peak_mb': None, 'payload_kb': 1.0} for length, stages in ms_per_stage.items() for stage, ms in stages.items()])
+
+
+def test_compare_flags_sizes_slower_than_the_tolerance():
+    baseline = results({5: {'accounts': 1.0, 'assemble': 1.0}, 20: {'accounts': 2.0, 'assemble': 2.0}, 40: {'accounts': 3.0, 'assemble': 3.0}})
+    current = results({5: {'accounts': 1.0, 'assemble': 1.4}, 20: {'accounts': 2.0, 'assemble': 3.1}, 60: {'accounts': 9.0, 'assemble': 9.0}})
+    regressions = bench.compare(current, baseline, tolerance=1.25)
+    assert list(regressions.index.get_level_values('forecast_length')) == [20]
+    assert regressions['ratio'].iloc[0] == pytest.approx(5.1 / 4.0)
+    assert bench.compare(current, baseline, tolerance=1.3).empty
+
+
+def test_run_reports_every_stage_of_each_size():
+    df = bench.run(lengths=(5,), expenses=(3,), accounts=(2,), lite=(False, True), monthly=(False, True), repeat=1, memory=False, progress=False)
+    table = bench.summary_table(df)
+    assert len(table) == 4 and (table['total ms'] > 0).all()
+    assert set(df.loc[df['monthly'], 'stage']) == {'monthly ledger', 'annual rollup', 'chart data', 'hover text', 'cash flow figure', 'composition charts', 'serialize'}
+    assert set(df.loc[~df['monthly'], 'stage']) == {'accounts', 'incomes', 'expenses', 'assemble', 'chart data', 'hover text', 'cash flow figure', 'composition charts', 'serialize'}
+
+
+def test_scaled_inputs_cost_something():
+    _, accounts, _, expenses = bench.make_inputs(20, 30, 4)
+    assert len(accounts) == 4 and [e.type for e in expenses[:3]] == ['Amortized Loan', 'Constant', 'One-Time Cost']
+    recurring = [e for e in expenses if e.type == 'Constant']
+    assert all(e.balance > 0 and e.start_age < e.end_age for e in recurring)
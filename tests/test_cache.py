@@ -0,0 +1,16 @@
+from planner.cache import ForecastCache, scenario_key
+from planner.engine import Assumptions, Expense
+
+
+def test_scenario_key_is_canonical():
+    a = Assumptions(start_year=2025)
+    assert scenario_key(a, [Expense('Car', 'One-Time Cost', 100)], {'x': 1, 'y': 2}) == scenario_key(Assumptions(start_year=2025), [Expense('Car', 'One-Time Cost', 100)], {'y': 2, 'x': 1})
+    assert scenario_key(a, {'lite_charts': False}) != scenario_key(a, {'lite_charts': True})
+
+
+def test_cache_is_lru_bounded():
+    cache, calls = ForecastCache(maxsize=2), []
+    compute = lambda key: cache.get_or_compute(key, lambda: calls.append(key) or key.upper())
+    assert [compute('a'), compute('b'), compute('a'), compute('c'), compute('b')] == ['A', 'B', 'A', 'C', 'B']
+    assert calls == ['a', 'b', 'c', 'b'] and len(cache) == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 4
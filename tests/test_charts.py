@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from planner import charts
+from planner.engine import Expense, project
+from planner.scenario import scenario_inputs
+
+
+@pytest.fixture
+def forecast():
+    a, accounts, incomes, _ = scenario_inputs({'forecast_length': 20, 'inc_pension2': True})
+    expenses = [Expense(f"Cost {i}", 'Constant', 100 * (i + 1), 30 + i, end_age=45) for i in range(20)]
+    return project(a, accounts, incomes, expenses)
+
+
+def test_reduce_keeps_the_largest_series_and_sums_the_rest():
+    values = np.array([[1.0, -9.0, 3.0, 0.5], [1.0, -9.0, 3.0, 0.5]])
+    names, reduced = charts._reduce(['a', 'b', 'c', 'd'], values, 3, 'Other')
+    assert names == ['b', 'c', 'Other']
+    np.testing.assert_array_equal(reduced, [[-9.0, 3.0, 1.5], [-9.0, 3.0, 1.5]])
+    assert charts._reduce(['a', 'b'], values[:, :2], 3, 'Other')[0] == ['a', 'b']
+    assert charts._reduce(['a', 'b', 'c', 'd'], values, None, 'Other')[0] == ['a', 'b', 'c', 'd']
+
+
+def test_long_frame_holds_every_column(forecast):
+    long_df = charts.long_frame(forecast); df = forecast.df
+    assert list(long_df.columns) == ['Age', 'Source', 'Value', 'Group']
+    for group, cols in [('income', forecast.income_cols), ('expense', forecast.expense_cols), ('asset', forecast.asset_cols), ('total', charts.TOTAL_COLS)]:
+        part = long_df[long_df['Group'] == group]
+        assert list(part['Source'].unique()) == list(cols)
+        wide = part.pivot(index='Age', columns='Source', values='Value')[list(cols)]
+        np.testing.assert_allclose(wide.to_numpy(), df.set_index('Age')[list(cols)].to_numpy())
+
+
+def test_lite_long_frame_folds_small_series_into_other(forecast):
+    full, lite = charts.long_frame(forecast), charts.long_frame(forecast, lite=True)
+    expense = lite[lite['Group'] == 'expense']
+    assert expense['Source'].nunique() == charts.LITE_MAX_SERIES and 'Other Expenses' in set(expense['Source'])
+    for group in ('income', 'expense', 'asset', 'total'):
+        assert lite.loc[lite['Group'] == group, 'Value'].sum() == pytest.approx(full.loc[full['Group'] == group, 'Value'].sum())
+
+
+def test_hover_text_lists_each_positive_income(forecast):
+    long_df = charts.long_frame(forecast); hover = charts.hover_text(long_df)
+    assert list(hover.index) == list(forecast.df['Age'])
+    row = forecast.df.set_index('Age').loc[40]
+    expected = [f"<b>{c}:</b> ${round(row[c]):,}" for c in forecast.income_cols if row[c] > 0]
+    assert hover.loc[40].split('<br>') == expected
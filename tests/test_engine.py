@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from planner.engine import Account, Assumptions, Expense, Income, funded_portfolio, project, project_totals, summarize_totals
+from planner.loans import expense_schedule
+from planner.scenario import scenario_inputs
+
+
+def reference_forecast(a, accounts, incomes, expenses):
+    # The original year-by-year loop from app.py, kept as a reference for the vectorized engine.
+    ages = list(range(a.current_age, a.current_age + a.forecast_length + 1)); n = len(ages)
+    cols, total_contributions = {}, 0.0
+    for acct in accounts:
+        bal, dd = [acct.balance] + [0.0] * (n - 1), [0.0] * n
+        for t in range(1, n):
+            prev = bal[t - 1]; growth = prev * a.investment_return / 100
+            if ages[t] < a.retirement_age: bal[t] = prev + growth + acct.monthly_contrib * 12; total_contributions += acct.monthly_contrib * 12
+            else:
+                if (acct.rmd and ages[t] >= a.rmd_start_age) or ages[t] >= acct.wd_start_age: dd[t] = (prev + growth) * acct.wd_rate / 100
+                bal[t] = prev + growth - dd[t]
+        cols[acct.name], cols[f"{acct.name} Drawdown"] = bal, dd
+    for inc in incomes:
+        cols[inc.name] = [inc.amount * (1 + inc.growth / 100) ** i if (inc.start_age is None or age >= inc.start_age) and (inc.end_age is None or age < inc.end_age) else 0.0 for i, age in enumerate(ages)]
+    for e in expenses:
+        if e.type == 'One-Time Cost': cols[e.name] = [-e.balance if age == e.start_age else 0.0 for age in ages]
+        elif e.type == 'Constant': cols[e.name] = [-e.balance * 12 if e.start_age <= age < e.end_age else 0.0 for age in ages]
+    return ages, cols, total_contributions
+
+
+@pytest.fixture
+def plan():
+    a = Assumptions(current_age=30, retirement_age=65, forecast_length=60, rmd_start_age=72, start_year=2025)
+    accounts = [Account('401k', 50000, 500, 70, 4.0, rmd=True), Account('Roth', 25000, 300, 65, 4.0), Account('Brokerage', 10000, 200, 66, 2.0)]
+    incomes = [Income('Job', 75000, 3.0, end_age=65), Income('Social Security', 24000, start_age=67), Income('Pension', 30000, start_age=55)]
+    expenses = [Expense('Mortgage', 'Amortized Loan', 250000, 35, 5.0, 1500), Expense('Car', 'One-Time Cost', 30000, 40), Expense('Food', 'Constant', 500, 30, end_age=80)]
+    return a, accounts, incomes, expenses
+
+
+def test_project_matches_reference_loop(plan):
+    ages, cols, total_contributions = reference_forecast(*plan)
+    forecast = project(*plan)
+    assert forecast.df['Age'].tolist() == ages
+    for name, values in cols.items(): np.testing.assert_allclose(forecast.df[name], values, err_msg=name)
+    assert forecast.total_contributions == pytest.approx(total_contributions)
+    expense_cols = ['Mortgage', 'Car', 'Food']
+    np.testing.assert_allclose(forecast.df['Total Expenses'], forecast.df[expense_cols].sum(axis=1))
+    np.testing.assert_allclose(forecast.df['Net Annual Cash Flow'], forecast.df['Total Income'] + forecast.df['Total Expenses'])
+
+
+def test_loan_years_charge_the_schedule(plan):
+    # The original loop charged 12 full payments in every year up to int(payoff age), overcharging
+    # the final year; the engine charges what the amortization schedule actually pays.
+    forecast = project(*plan); mortgage = plan[3][0]; schedule = expense_schedule(mortgage)
+    charged = -forecast.df.set_index('Age')['Mortgage']
+    assert charged.sum() == pytest.approx(schedule.payment.sum())
+    paying = charged[charged > 0]
+    assert paying.index[0] == mortgage.start_age and paying.index[-1] == schedule.payoff_age
+    np.testing.assert_allclose(paying.iloc[:-1], mortgage.payment * 12)
+    assert 0 < paying.iloc[-1] <= mortgage.payment * 12
+    events = {e['Event']: e['Age'] for e in forecast.events}
+    assert events['Mortgage Begins'] == 35 and events['Mortgage Paid Off'] == schedule.payoff_age
+
+
+def test_funded_portfolio_compounds_shortfalls():
+    a, accounts, incomes, expenses = scenario_inputs({'inc_pension1': False, 'forecast_length': 60, 'expenses': [{'name': 'Living', 'type': 'Constant', 'balance': 18000, 'start_age': 30, 'end_age': 200}]})
+    totals, contributions = project_totals(a, accounts, incomes, expenses)
+    growth = 1 + a.investment_return / 100; owed = 0.0; expected = []
+    for age, net, assets in zip(totals['Age'], totals['Net Annual Cash Flow'], totals['Total Assets']):
+        owed = owed * growth + (max(-net, 0.0) if age >= a.retirement_age else 0.0); expected.append(assets - owed)
+    np.testing.assert_allclose(funded_portfolio(totals['Total Assets'], totals['Net Annual Cash Flow'], totals['Age'], a.retirement_age, growth), expected)
+    summary = summarize_totals(totals, a.retirement_age, contributions, a.investment_return)
+    assert summary['funded_ending_assets'] == pytest.approx(expected[-1])
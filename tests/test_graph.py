@@ -0,0 +1,46 @@
+from dataclasses import replace
+
+import pandas as pd
+
+from planner.engine import Expense, project
+from planner.graph import ForecastGraph
+from planner.scenario import scenario_inputs
+
+
+def expenses(n):
+    kinds = [lambda i: Expense(f"Loan {i}", 'Amortized Loan', 50000 + 1000 * i, 31 + i % 20, 4.0, 600), lambda i: Expense(f"Food {i}", 'Constant', 300 + i, 30, end_age=60 + i % 20), lambda i: Expense(f"Trip {i}", 'One-Time Cost', 2000 + i, 35 + i % 30)]
+    return [kinds[i % 3](i) for i in range(n)]
+
+
+def assert_matches_project(forecast, a, accounts, incomes, exps):
+    expected = project(a, accounts, incomes, exps)
+    pd.testing.assert_frame_equal(forecast.df, expected.df, check_exact=False, rtol=1e-9)
+    assert forecast.expense_cols == expected.expense_cols and forecast.income_cols == expected.income_cols
+    assert sorted(e['Event'] for e in forecast.events) == sorted(e['Event'] for e in expected.events)
+
+
+def test_edits_recompute_one_node_and_match_a_full_projection():
+    a, accounts, incomes, _ = scenario_inputs({}); exps = expenses(30); graph = ForecastGraph()
+    first = graph.update(a, accounts, incomes, exps); snapshot = first.df.copy()
+    edits = [
+        lambda e: e[:4] + [replace(e[4], payment=900)] + e[5:],
+        lambda e: e + [Expense('Boat', 'One-Time Cost', 40000, 45)],
+        lambda e: e[:10] + e[11:],
+        lambda e: e[::-1],
+        lambda e: e + [Expense('Food 1', 'Constant', 50, 40, end_age=50)],
+        lambda e: [replace(e[0], balance=0)] + e[1:],
+    ]
+    for edit in edits:
+        exps = edit(exps); forecast = graph.update(a, accounts, incomes, exps)
+        assert len(graph.recomputed) <= 1
+        assert_matches_project(forecast, a, accounts, incomes, exps)
+    pd.testing.assert_frame_equal(first.df, snapshot)
+
+
+def test_assumption_changes_rebuild_the_frame():
+    a, accounts, incomes, _ = scenario_inputs({}); exps = expenses(12); graph = ForecastGraph()
+    graph.update(a, accounts, incomes, exps)
+    for changed in [replace(a, investment_return=5.0), replace(a, forecast_length=25), replace(a, current_age=35, forecast_length=25)]:
+        assert_matches_project(graph.update(changed, accounts, incomes, exps), changed, accounts, incomes, exps)
+    assert_matches_project(graph.update(a, accounts, incomes[:2], exps[:3]), a, accounts, incomes[:2], exps[:3])
+    assert graph.update(a, accounts, incomes[:2], exps[:3]) is not None and graph.recomputed == []
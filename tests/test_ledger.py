@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from planner.engine import Account, Assumptions, Expense, Income, project, summarize
+from planner.ledger import project_monthly
+from planner.scenario import scenario_inputs
+
+
+@pytest.fixture
+def plan():
+    a = Assumptions(current_age=30, retirement_age=65, forecast_length=40, start_year=2025)
+    accounts = [Account('401k', 50000, 500, 65, 4.0, rmd=True), Account('Roth', 25000, 300, 67, 4.0)]
+    incomes = [Income('Job', 75000, 3.0, end_age=65), Income('Social Security', 24000, start_age=67)]
+    expenses = [Expense('Mortgage', 'Amortized Loan', 250000, 35, 5.0, 1500), Expense('Car', 'One-Time Cost', 30000, 40), Expense('Food', 'Constant', 500, 30, end_age=60)]
+    return a, accounts, incomes, expenses
+
+
+def test_annual_rollup_matches_monthly_block(plan):
+    ledger = project_monthly(*plan); a = ledger.n_accounts
+    annual = ledger.annual(); months = ledger.values
+    assert months.shape == (12 * len(ledger.years), len(ledger.names)) and months.dtype == np.float64
+    assert np.shares_memory(months.reshape(len(ledger.years), 12, -1), months)
+    np.testing.assert_allclose(annual[:, :a], months[::12, :a])
+    for year in range(len(ledger.years)): np.testing.assert_allclose(annual[year, a:], months[12 * year:12 * year + 12, a:].sum(axis=0))
+    np.testing.assert_allclose(annual[:, a:].sum(axis=0), months[:, a:].sum(axis=0))
+
+
+def test_flows_match_the_annual_engine_on_whole_ages(plan):
+    monthly, annual = project_monthly(*plan).forecast(), project(*plan)
+    assert list(monthly.df.columns) == list(annual.df.columns)
+    for col in ['Job', 'Social Security', 'Mortgage', 'Car', 'Food', 'Total Expenses']: np.testing.assert_allclose(monthly.df[col], annual.df[col], err_msg=col)
+    key = lambda e: (e['Age'], e['Event'])
+    assert sorted(map(key, monthly.events)) == sorted(map(key, annual.events))
+
+
+def test_monthly_compounding_without_flows():
+    a = Assumptions(current_age=30, retirement_age=80, forecast_length=10, investment_return=6.0)
+    ledger = project_monthly(a, [Account('Cash', 1000, 0, 80, 0.0)])
+    np.testing.assert_allclose(ledger.forecast().df['Cash'], 1000 * 1.06 ** np.arange(11))
+
+
+def test_mid_year_ages():
+    a = Assumptions(current_age=30, forecast_length=20)
+    ledger = project_monthly(a, [], [Income('Contract', 12000, start_age=40.5, end_age=41.25)], [Expense('Deposit', 'One-Time Cost', 100, 35.5)])
+    df = ledger.forecast().df.set_index('Age')
+    assert df.loc[40, 'Contract'] == pytest.approx(6000) and df.loc[41, 'Contract'] == pytest.approx(3000)
+    assert df['Contract'].sum() == pytest.approx(9000) and df.loc[35, 'Deposit'] == -100
+    assert project(a, [], [], [Expense('Deposit', 'One-Time Cost', 100, 35.5)]).df.set_index('Age').loc[35, 'Deposit'] == -100
+
+
+def test_mid_year_retirement_is_summarized():
+    a, accounts, incomes, expenses = scenario_inputs({'retirement_age': 62.5, 'pretax_wd_start': 63.25, 'rmd_start_age': 73.5})
+    assert (a.retirement_age, accounts[0].wd_start_age, accounts[1].wd_start_age, a.rmd_start_age) == (62.5, 63.25, 62.5, 73.5)
+    assert [i.end_age for i in incomes[:2]] == [62.5, 62.5] and scenario_inputs({'retirement_age': 62.0})[0].retirement_age == 62
+    forecast = project_monthly(a, accounts, incomes, expenses).forecast(); df = forecast.df.set_index('Age')
+    summary = summarize(forecast, a.retirement_age, a.investment_return)
+    assert summary['net_worth_at_retirement'] == pytest.approx(df.loc[62, forecast.asset_cols].sum()) and summary['net_worth_at_retirement'] > 0
+    # The mixed year 62 (half salary, half drawdowns) sits in neither averaging window.
+    income = df['Total Income']
+    assert summary['avg_retirement_income'] == pytest.approx(income.loc[63:].mean())
+    assert summary['replacement_ratio'] == pytest.approx(100 * income.loc[63:].mean() / income.loc[57:61].mean())
+    assert df.loc[62, 'Primary Job'] == pytest.approx(df.loc[61, 'Primary Job'] * 1.03 / 2)
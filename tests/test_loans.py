@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+from planner.loans import MAX_MONTHS, loan_schedule
+
+
+def npf_interest(balance, monthly_rate, payment, months):
+    # Interest over the first `months` payments of a standard amortization, per numpy-financial.
+    nper = npf.nper(monthly_rate, -payment, balance)
+    return float(-npf.ipmt(monthly_rate, np.arange(1, months + 1), nper, balance).sum())
+
+
+@pytest.mark.parametrize("balance, rate, payment, extra", [(250000, 5.0, 1500, 0), (250000, 5.0, 1500, 500), (30000, 7.9, 600, 0), (400000, 3.25, 2200, 150)])
+def test_schedule_matches_numpy_financial(balance, rate, payment, extra):
+    schedule = loan_schedule(balance, rate, payment, extra)
+    r = rate / 100 / 12; nper = float(npf.nper(r, -(payment + extra), balance))
+    assert schedule.paid_off and schedule.months == math.ceil(nper)
+    # The final partial month is counted by the share of a payment it takes, within a day of nper.
+    assert schedule.years_to_payoff == pytest.approx(nper / 12, abs=1 / 365)
+    assert schedule.total_interest == pytest.approx(npf_interest(balance, r, payment + extra, schedule.months), rel=1e-9)
+    assert schedule.payment.sum() == pytest.approx(balance + schedule.total_interest)
+    assert schedule.balance[-1] == 0
+
+
+def test_rate_reset_matches_two_numpy_financial_phases():
+    balance, payment, start_age, reset_age = 250000, 1500, 35, 40
+    schedule = loan_schedule(balance, 3.0, payment, rate_resets=((reset_age, 6.5),), start_age=start_age)
+    r1, r2, k = 3.0 / 100 / 12, 6.5 / 100 / 12, (reset_age - start_age) * 12
+    remaining = float(-npf.fv(r1, k, -payment, balance))
+    nper2 = float(npf.nper(r2, -payment, remaining))
+    assert schedule.months == k + math.ceil(nper2)
+    assert schedule.balance[k - 1] == pytest.approx(remaining)
+    expected = npf_interest(balance, r1, payment, k) + npf_interest(remaining, r2, payment, math.ceil(nper2))
+    assert schedule.total_interest == pytest.approx(expected, rel=1e-9)
+
+
+def test_zero_rate_and_unpayable_loans():
+    free = loan_schedule(12000, 0.0, 1000)
+    assert free.months == 12 and free.total_interest == 0
+    never = loan_schedule(500000, 8.0, 1000)
+    assert not never.paid_off and never.months == MAX_MONTHS and never.payoff_age is None
+    assert loan_schedule(0, 5.0, 1000) is None
+
+
+def test_schedules_are_read_only():
+    schedule = loan_schedule(250000, 5.0, 1500)
+    with pytest.raises(ValueError): schedule.payment[0] = 0
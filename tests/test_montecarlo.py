@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from planner.engine import project, summarize
+from planner.montecarlo import simulate
+from planner.scenario import scenario_inputs
+
+
+def lean(monthly_cost): return scenario_inputs({'inc_pension1': False, 'forecast_length': 60, 'expenses': [{'name': 'Living', 'type': 'Constant', 'balance': monthly_cost, 'start_age': 30, 'end_age': 200}]})
+
+
+def test_seeded_runs_are_reproducible():
+    one = simulate(*lean(9000), n_paths=2000, seed=7, chunk_size=500)
+    again = simulate(*lean(9000), n_paths=2000, seed=7, chunk_size=500, workers=2)
+    assert one.success_probability == again.success_probability
+    np.testing.assert_array_equal(one.bands.to_numpy(), again.bands.to_numpy())
+    assert 0 < one.success_probability < 1
+    assert one.depletion_distribution()['Share of Paths'].sum() == pytest.approx(1 - one.success_probability)
+
+
+def test_without_volatility_every_path_is_the_deterministic_plan():
+    mc = simulate(*scenario_inputs({}), n_paths=100, return_sd=0.0, inflation_sd=0.0, seed=1)
+    assert mc.success_probability == 1.0
+    np.testing.assert_allclose(mc.bands['P5'], mc.bands['P95'], rtol=1e-6)
+
+
+def test_inflation_volatility_drives_the_success_probability():
+    calm = simulate(*lean(15000), n_paths=4000, return_sd=0.0, inflation_sd=0.0, seed=3)
+    volatile = simulate(*lean(15000), n_paths=4000, return_sd=0.0, inflation_sd=3.0, seed=3)
+    assert calm.success_probability == 1.0
+    assert 0.5 < volatile.success_probability < 1.0
+
+
+def test_deterministic_depletion_agrees_with_the_simulation():
+    a, accounts, incomes, expenses = lean(20000)
+    mc = simulate(a, accounts, incomes, expenses, n_paths=100, return_sd=0.0, inflation_sd=0.0, seed=5)
+    summary = summarize(project(a, accounts, incomes, expenses), a.retirement_age, a.investment_return)
+    assert mc.success_probability == 0.0 and summary['funded_depletion_age'] is not None
+    assert (mc.depletion_ages == summary['funded_depletion_age']).all()
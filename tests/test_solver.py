@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from planner.engine import project_totals, summarize_totals
+from planner.scenario import RETIREMENT_AGE_RANGE, scenario_inputs
+from planner.solver import earliest_retirement_age, max_drawdown_rate, min_monthly_contribution
+
+LEAN = {'inc_pension1': False, 'forecast_length': 60, 'expenses': [{'name': 'Living', 'type': 'Constant', 'balance': 20000, 'start_age': 30, 'end_age': 200}]}
+
+
+def summary(scenario):
+    a, accounts, incomes, expenses = scenario_inputs(scenario)
+    totals, contributions = project_totals(a, accounts, incomes, expenses)
+    return summarize_totals(totals, a.retirement_age, contributions, a.investment_return)
+
+
+def never_depletes(scenario, min_ending_assets=0.0):
+    s = summary(scenario)
+    return s['funded_depletion_age'] is None and s['funded_ending_assets'] >= min_ending_assets
+
+
+@pytest.mark.parametrize("scenario, target", [({'ss_start_age': 62, 'inc_job2': False}, 66), ({'ss_start_age': 62, 'inc_job2': False}, 68), ({}, 63), ({}, 70), ({'inc_pension1': False}, 60)])
+def test_earliest_retirement_age_matches_full_scan(scenario, target):
+    a, *_ = scenario_inputs(scenario)
+    ages = range(max(a.current_age + 1, RETIREMENT_AGE_RANGE[0]), min(a.current_age + a.forecast_length, RETIREMENT_AGE_RANGE[1]) + 1)
+    expected = next((age for age in ages if summary({**scenario, 'retirement_age': age})['replacement_ratio'] >= target), None)
+    assert earliest_retirement_age(scenario, min_replacement=target) == expected
+
+
+def test_earliest_retirement_age_stays_within_the_widget_range():
+    # An early pension lifts every ratio from 23 on, below the widget's minimum age.
+    young = {'current_age': 22, 'forecast_length': 60, 'job1_income': 20000, 'inc_job2': False, 'pension1_start_age': 23, 'pension1_annual_amount': 60000}
+    assert summary({**young, 'retirement_age': 23})['replacement_ratio'] >= 100
+    assert earliest_retirement_age(young, min_replacement=100) == RETIREMENT_AGE_RANGE[0]
+    assert earliest_retirement_age(young, min_replacement=100, min_age=25) == 25
+    assert earliest_retirement_age({'current_age': 90, 'forecast_length': 30}, min_replacement=0) == 91
+    assert earliest_retirement_age({'current_age': 99, 'forecast_length': 10}, min_replacement=0) == 100
+    assert earliest_retirement_age({'current_age': 100, 'forecast_length': 10}, min_replacement=0) is None
+
+
+def test_drawdown_start_follows_the_candidate_retirement_age():
+    scenario = {'retirement_age': 65, 'pretax_wd_start': 65, 'roth_wd_start': 65, 'brokerage_wd_start': 67, 'ss_start_age': 62, 'inc_job2': False}
+    found = earliest_retirement_age(scenario, min_replacement=66)
+    shifted = {**scenario, 'retirement_age': found, 'pretax_wd_start': found, 'roth_wd_start': found, 'brokerage_wd_start': found + 2}
+    assert summary(shifted)['replacement_ratio'] >= 66
+
+
+@pytest.mark.parametrize("account, fields", [('pretax', ['pretax_contrib']), ('all', ['pretax_contrib', 'roth_contrib', 'brokerage_contrib'])])
+def test_min_monthly_contribution_matches_grid_scan(account, fields):
+    found = min_monthly_contribution(LEAN, account=account)
+    grid = np.arange(0, 2000, 10.0)
+    expected = next(x for x in grid if never_depletes({**LEAN, **{f: x for f in fields}}))
+    assert expected - 10 < found <= expected
+    assert never_depletes({**LEAN, **{f: found for f in fields}})
+
+
+def test_max_drawdown_rate_matches_grid_scan():
+    floor = summary({})['net_worth_at_retirement']
+    found = max_drawdown_rate({}, account='roth')
+    grid = np.arange(0, 100.25, 0.25)
+    expected = max(x for x in grid if never_depletes({'roth_wd_rate': x}, floor))
+    assert expected <= found < expected + 0.25
+    assert never_depletes({'roth_wd_rate': found}, floor)
+
+
+def test_unreachable_goals_return_none():
+    assert earliest_retirement_age({}, min_replacement=500) is None
+    assert min_monthly_contribution({**LEAN, 'expenses': [{**LEAN['expenses'][0], 'balance': 10_000_000}]}, max_contribution=1000) is None